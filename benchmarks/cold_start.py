@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark - import time and time to first generated code
+
+Runs fresh interpreters (as a serverless worker would) and reports:
+  - import time of the package, measured with ``python -X importtime``
+  - wall time from interpreter start of the script to the first QR code
+
+Usage: python benchmarks/cold_start.py [--runs N] [--import-budget-ms MS] [--first-code-budget-ms MS]
+Exit status is 1 when a median exceeds its budget.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_CODE_SCRIPT = (
+    "import time; start = time.perf_counter()\n"
+    "import contextlib, io\n"
+    "from qrgenerator import QRCodeGenerator\n"
+    "with contextlib.redirect_stdout(io.StringIO()):\n"
+    "    QRCodeGenerator().generate('https://example.com/item/000123', 'M')\n"
+    "print((time.perf_counter() - start) * 1000)\n"
+)
+
+
+def _run_python(args):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable] + args, cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    )
+
+
+def measure_import_ms(module='qrgenerator'):
+    """Cumulative import time of ``module`` in milliseconds (from -X importtime)"""
+    result = _run_python(['-X', 'importtime', '-c', f'import {module}'])
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def measure_first_code_ms():
+    result = _run_python(['-c', FIRST_CODE_SCRIPT])
+    return float(result.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=25.0)
+    parser.add_argument('--first-code-budget-ms', type=float, default=150.0)
+    args = parser.parse_args()
+
+    # Warm-up run so .pyc compilation is not counted
+    measure_first_code_ms()
+    import_times = [measure_import_ms() for _ in range(args.runs)]
+    first_code_times = [measure_first_code_ms() for _ in range(args.runs)]
+
+    results = [
+        ('import qrgenerator', import_times, args.import_budget_ms),
+        ('first code', first_code_times, args.first_code_budget_ms),
+    ]
+    over_budget = False
+    for name, samples, budget in results:
+        median = statistics.median(samples)
+        status = 'OK' if median <= budget else 'OVER BUDGET'
+        over_budget = over_budget or median > budget
+        print(f"{name:<20} median={median:8.2f}ms  min={min(samples):8.2f}ms  "
+              f"budget={budget:.0f}ms  {status}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,60 +4,134 @@ QR Code Generator - Γεννήτρια Κωδικών QR
 =========================================
 Κύριο πρόγραμμα για γρήγορη δημιουργία QR codes από γραμμή εντολών
 
-Χρήση: python generate_qr.py <δεδομένα> [επίπεδο_EC] [αρχείο_εξόδου]
+Χρήση: python generate_qr.py <δεδομένα> [επίπεδο_EC] [αρχείο_εξόδου] [--profile[=αρχείο.pstats]] [--micro]
 
 Παραδείγματα:
   python generate_qr.py 'Hello World'
   python generate_qr.py 'https://example.com' M output/url.svg
   python generate_qr.py 'Καλημέρα' L greeting.svg
+  python generate_qr.py 'Hello World' M --profile
+  python generate_qr.py 'Hello World' M out.svg --profile=run.pstats
+  python generate_qr.py 'ID-000123' Q label.zpl
+  python generate_qr.py '0123456789' L small.svg --micro
+
+Μορφές εξόδου (κατά την κατάληξη αρχείου): .svg (προεπιλογή), .zpl, .pbm, .bmp
 
 Επίπεδα EC: L (~7%), M (~15%), Q (~25%), H (~30%)
+
+Με --micro παράγεται Micro QR (M2–M4, 13×13 έως 17×17) όταν τα δεδομένα χωράνε.
 """
 
+import os
 import sys
+from contextlib import nullcontext
 from qrgenerator import QRCodeGenerator, SVGRenderer, ASCIIRenderer
 
+# Raster μορφές για εκτυπωτές ετικετών (γράφονται απευθείας σε bytes)
+RASTER_RENDERERS = {
+    '.zpl': 'ZPLRenderer',
+    '.pbm': 'PBMRenderer',
+    '.bmp': 'BMPRenderer',
+}
+
+
+def _pop_flag(args, name):
+    """Αφαιρεί ένα --flag[=τιμή] από τα ορίσματα· επιστρέφει None, True ή την τιμή"""
+    for i, arg in enumerate(args):
+        if arg == name:
+            del args[i]
+            return True
+        if arg.startswith(name + '='):
+            del args[i]
+            return arg[len(name) + 1:]
+    return None
+
 
 def main():
     """Κύρια συνάρτηση - επεξεργασία ορισμάτων και δημιουργία QR"""
-    if len(sys.argv) < 2:
-        print("Χρήση: python generate_qr.py <δεδομένα> [επίπεδο_EC] [αρχείο_εξόδου]")
+    args = sys.argv[1:]
+    profile_option = _pop_flag(args, '--profile')
+    if profile_option == '':
+        print("Σφάλμα: το --profile= χρειάζεται όνομα αρχείου (ή σκέτο --profile χωρίς αποθήκευση)")
+        sys.exit(1)
+    micro = bool(_pop_flag(args, '--micro'))
+
+    if len(args) < 1:
+        print("Χρήση: python generate_qr.py <δεδομένα> [επίπεδο_EC] [αρχείο_εξόδου] [--profile[=αρχείο.pstats]] [--micro]")
         print()
         print("Παραδείγματα:")
         print("  python generate_qr.py 'Hello World'")
         print("  python generate_qr.py 'https://example.com' M output/url.svg")
         print("  python generate_qr.py '123456' H")
         print("  python generate_qr.py 'Καλημέρα' L greeting.svg")
+        print("  python generate_qr.py 'Hello World' M --profile")
+        print("  python generate_qr.py 'ID-000123' Q label.zpl")
+        print("  python generate_qr.py '0123456789' L small.svg --micro")
         print()
         print("Επίπεδα EC: L (7%), M (15%), Q (25%), H (30%)")
         sys.exit(1)
     
     # Ανάλυση ορισμάτων
-    data = sys.argv[1]
-    ec_level = sys.argv[2] if len(sys.argv) > 2 else 'M'
-    output_file = sys.argv[3] if len(sys.argv) > 3 else None
-    
+    data = args[0]
+    ec_level = args[1] if len(args) > 1 else 'M'
+    output_file = args[2] if len(args) > 2 else None
+
+    profiler = None
+    if profile_option:
+        # Φόρτωση μόνο όταν ζητηθεί (cProfile/pstats αυξάνουν το cold start)
+        from qrgenerator import QRProfiler
+        profiler = QRProfiler()
+    with profiler if profiler else nullcontext():
+        _run(data, ec_level, output_file, profiler, micro)
+
+    # Αναφορά profiling (κορυφαίες συναρτήσεις και peak μνήμη ανά στάδιο)
+    if profiler:
+        print()
+        print(profiler.report())
+        if isinstance(profile_option, str):
+            profiler.dump_stats(profile_option)
+            print(f"Αποθηκεύτηκαν στατιστικά profiling σε: {profile_option}")
+
+
+def _stage(profiler, name):
+    return profiler.stage(name) if profiler else nullcontext()
+
+
+def _run(data, ec_level, output_file, profiler=None, micro=False):
+    """Δημιουργία, εμφάνιση και αποθήκευση QR (με προαιρετικό profiling)"""
     # Δημιουργία QR code
     gen = QRCodeGenerator()
-    qr = gen.generate(data, ec_level)
+    with _stage(profiler, 'generate'):
+        qr = gen.generate(data, ec_level, micro=micro)
     
     print(f"Δημιουργήθηκε QR Code:")
     print(f"  Δεδομένα: {data[:50]}{'...' if len(data) > 50 else ''}")
-    print(f"  Έκδοση: {qr.version}")
+    print(f"  Έκδοση: {getattr(qr, 'name', qr.version)}")
     print(f"  Μέγεθος: {qr.size}×{qr.size}")
     print(f"  Επίπεδο EC: {ec_level}")
     
     # Αποθήκευση αν καθορίστηκε αρχείο εξόδου
-    if output_file:
+    extension = os.path.splitext(output_file)[1].lower() if output_file else ''
+    if extension in RASTER_RENDERERS:
+        import qrgenerator
+        renderer = getattr(qrgenerator, RASTER_RENDERERS[extension])()
+        with _stage(profiler, 'render'), open(output_file, 'wb') as f:
+            renderer.write(qr, f, module_size=4, border=qr.QUIET_ZONE)
+        print(f"  Αποθηκεύτηκε σε: {output_file}")
+    elif output_file:
         renderer = SVGRenderer()
+        with _stage(profiler, 'render'):
+            svg = renderer.render(qr, module_size=10, border=qr.QUIET_ZONE)
         with open(output_file, 'w') as f:
-            f.write(renderer.render(qr, module_size=10, border=4))
+            f.write(svg)
         print(f"  Αποθηκεύτηκε σε: {output_file}")
     else:
         # Εμφάνιση ASCII preview
         ascii_renderer = ASCIIRenderer()
+        with _stage(profiler, 'render'):
+            preview = ascii_renderer.render(qr, border=2)
         print()
-        print(ascii_renderer.render(qr, border=2))
+        print(preview)
 
 
 if __name__ == "__main__":
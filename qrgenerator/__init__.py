@@ -2,19 +2,48 @@
 QR Generator Package
 
 Lightweight, standalone QR code generator package exposing main classes.
+Submodules are imported lazily on first attribute access to keep cold start fast.
 """
 
-from .qr_generator import QRCodeGenerator
-from .qr_renderer import SVGRenderer, ASCIIRenderer
-from .qr_encoder import QREncoder
-from .qr_matrix import QRMatrix
+from importlib import import_module
 
 __version__ = "1.0.0"
 
+_LAZY_ATTRIBUTES = {
+    "QRCodeGenerator": ".qr_generator",
+    "SVGRenderer": ".qr_renderer",
+    "ASCIIRenderer": ".qr_renderer",
+    "ZPLRenderer": ".qr_renderer",
+    "PBMRenderer": ".qr_renderer",
+    "BMPRenderer": ".qr_renderer",
+    "QREncoder": ".qr_encoder",
+    "QRMatrix": ".qr_matrix",
+    "MicroQRMatrix": ".qr_micro",
+    "QRProfiler": ".qr_profiler",
+}
+
 __all__ = [
     "QRCodeGenerator",
     "SVGRenderer",
     "ASCIIRenderer",
+    "ZPLRenderer",
+    "PBMRenderer",
+    "BMPRenderer",
     "QREncoder",
     "QRMatrix",
+    "MicroQRMatrix",
+    "QRProfiler",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
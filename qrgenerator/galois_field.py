@@ -2,34 +2,49 @@
 Galois Field GF(2^8) arithmetic for Reed-Solomon error correction
 """
 
+# Generator polynomial: x^8 + x^4 + x^3 + x^2 + 1 (0x11d)
+PRIMITIVE_POLYNOMIAL = 0x11d
+
+# Log/antilog tables, built once per process on first use and shared
+_TABLES = None
+
+
+def get_tables():
+    """Return the shared (exp_table, log_table) pair, building it on first use"""
+    global _TABLES
+    if _TABLES is None:
+        _TABLES = _generate_tables(PRIMITIVE_POLYNOMIAL)
+    return _TABLES
+
+
+def _generate_tables(primitive):
+    """Generate exponential and logarithm tables"""
+    exp_table = [0] * 512  # Extended to 512 for easier modulo
+    log_table = [0] * 256
+    x = 1
+    for i in range(255):
+        exp_table[i] = x
+        log_table[x] = i
+
+        # Multiply by 2 (alpha) in GF(2^8)
+        x <<= 1
+        if x & 0x100:  # If overflow
+            x ^= primitive
+
+    # Extend exp table for modulo operations
+    for i in range(255, 512):
+        exp_table[i] = exp_table[i - 255]
+    return exp_table, log_table
+
+
 class GaloisField:
     """Implementation of GF(2^8) for QR Code error correction"""
     
     def __init__(self):
-        # Generator polynomial: x^8 + x^4 + x^3 + x^2 + 1 (0x11d)
-        self.primitive = 0x11d
-        
-        # Precompute log and antilog tables for faster computation
-        self.exp_table = [0] * 512  # Extended to 512 for easier modulo
-        self.log_table = [0] * 256
-        
-        self._generate_tables()
-    
-    def _generate_tables(self):
-        """Generate exponential and logarithm tables"""
-        x = 1
-        for i in range(255):
-            self.exp_table[i] = x
-            self.log_table[x] = i
-            
-            # Multiply by 2 (alpha) in GF(2^8)
-            x <<= 1
-            if x & 0x100:  # If overflow
-                x ^= self.primitive
+        self.primitive = PRIMITIVE_POLYNOMIAL
         
-        # Extend exp table for modulo operations
-        for i in range(255, 512):
-            self.exp_table[i] = self.exp_table[i - 255]
+        # Precomputed log and antilog tables, shared by all instances
+        self.exp_table, self.log_table = get_tables()
     
     def multiply(self, a, b):
         """Multiply two numbers in GF(2^8)"""
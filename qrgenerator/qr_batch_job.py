@@ -0,0 +1,363 @@
+"""
+Resumable, shardable batch jobs with checkpoint manifests
+
+The input is a text file with one payload per line. Row r (0-based) belongs to
+shard r % N, so any number of machines can split one file without talking to
+each other; the row number is also the symbol's sequence number in the output.
+
+Each shard writes one symbol store per version plus a manifest,
+``shard-<i>-of-<N>.manifest.json``, rewritten atomically every
+``checkpoint_every`` rows with the next input row and byte offset, the record
+count and SHA-256 of every store's record region, the rows that could not be
+encoded (``failed_rows``, skipped) and a ``complete`` flag.
+A restarted shard verifies the hashes, rolls its stores back to the checkpoint
+and continues from the saved offset; a complete shard is skipped.
+``merge_shards`` checks that all N manifests are complete and consistent and
+concatenates the shard stores into one store per version.
+
+Usage: python -m qrgenerator.qr_batch_job run INPUT OUTDIR [--shard i/N] [--ec-level M]
+                                              [--version V] [--checkpoint-every 1000]
+                                              [--engine NAME]
+       python -m qrgenerator.qr_batch_job merge OUTDIR DESTINATION
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .qr_encoder import Payload
+from .qr_engines import EngineSpec
+from .qr_generator import QRCodeGenerator
+from .qr_matrix import EC_LEVELS, QRMatrix
+from .qr_store import HEADER, SEQUENCE, SymbolStore, SymbolStoreWriter, record_size
+
+MANIFEST_REVISION = 1
+DEFAULT_CHECKPOINT_EVERY = 1000
+HASH_CHUNK = 1 << 20
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """'i/N' -> (i, N) with 0 <= i < N"""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {text!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index must satisfy 0 <= i < N, got {index}/{count}")
+    return index, count
+
+
+def shard_name(shard: int, num_shards: int) -> str:
+    return f"shard-{shard}-of-{num_shards}"
+
+
+def manifest_path(output_dir: str, shard: int, num_shards: int) -> str:
+    return os.path.join(output_dir, shard_name(shard, num_shards) + '.manifest.json')
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _records_digest(path: str, version: int, count: int) -> 'hashlib._Hash':
+    """SHA-256 state over the first ``count`` record slots of a store"""
+    digest = hashlib.sha256()
+    remaining = count * record_size(version)
+    with open(path, 'rb') as f:
+        f.seek(HEADER.size)
+        while remaining:
+            chunk = f.read(min(HASH_CHUNK, remaining))
+            if not chunk:
+                raise ValueError(f"Store {path} is shorter than its checkpoint ({count} records)")
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest
+
+
+def _decode_row(line: bytes) -> Payload:
+    line = line.rstrip(b'\r\n')
+    try:
+        return line.decode('utf-8')
+    except UnicodeDecodeError:
+        return line
+
+
+def _write_manifest(path: str, manifest: dict) -> None:
+    temp = path + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def load_manifest(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('revision') != MANIFEST_REVISION:
+        raise ValueError(f"{path} is not a batch job manifest (revision {MANIFEST_REVISION})")
+    return manifest
+
+
+class ShardJob:
+    """One shard of a batch job; ``run()`` starts it or resumes it from its manifest"""
+
+    def __init__(self, input_path: str, output_dir: str, shard: int = 0, num_shards: int = 1,
+                 ec_level: str = 'M', version: Optional[int] = None,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+                 engine: EngineSpec = None):
+        if num_shards < 1 or not 0 <= shard < num_shards:
+            raise ValueError(f"Shard index must satisfy 0 <= i < N, got {shard}/{num_shards}")
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1")
+        # Checked here so that _write_symbols only skips rows for reasons of their own
+        if ec_level not in EC_LEVELS:
+            raise ValueError(f"Invalid EC level {ec_level!r} (expected one of {', '.join(EC_LEVELS)})")
+        if version is not None and version not in QRMatrix.VERSIONS:
+            raise ValueError(f"Invalid version {version!r} (expected 1-40)")
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.shard = shard
+        self.num_shards = num_shards
+        self.ec_level = ec_level
+        self.version = version
+        self.checkpoint_every = checkpoint_every
+        self.engine = engine
+        self.manifest_path = manifest_path(output_dir, shard, num_shards)
+        self._writers: Dict[int, SymbolStoreWriter] = {}
+        self._digests: Dict[int, 'hashlib._Hash'] = {}
+
+    def _new_manifest(self, input_sha256: str) -> dict:
+        return {
+            'revision': MANIFEST_REVISION,
+            'input_sha256': input_sha256,
+            'shard': self.shard,
+            'num_shards': self.num_shards,
+            'ec_level': self.ec_level,
+            'version': self.version,
+            'next_row': 0,
+            'input_offset': 0,
+            'rows_done': 0,
+            'failed_rows': [],
+            'outputs': {},
+            'complete': False,
+        }
+
+    def _check_manifest(self, manifest: dict, input_sha256: str) -> None:
+        expected = self._new_manifest(input_sha256)
+        for key in ('input_sha256', 'shard', 'num_shards', 'ec_level', 'version'):
+            if manifest.get(key) != expected[key]:
+                raise ValueError(
+                    f"{self.manifest_path} was written for a different job "
+                    f"({key}={manifest.get(key)!r}, expected {expected[key]!r}); "
+                    f"use another output directory or remove the shard's files"
+                )
+
+    def _store_path(self, version: int) -> str:
+        return os.path.join(self.output_dir, f"{shard_name(self.shard, self.num_shards)}.v{version}.qrs")
+
+    def _writer(self, version: int) -> SymbolStoreWriter:
+        writer = self._writers.get(version)
+        if writer is None:
+            path = self._store_path(version)
+            if os.path.exists(path):
+                # Records past the last checkpoint are not covered by the manifest
+                os.remove(path)
+            writer = self._writers[version] = SymbolStoreWriter(path, version)
+            self._digests[version] = hashlib.sha256()
+        return writer
+
+    def _restore_outputs(self, manifest: dict) -> None:
+        """Verify every store against the checkpoint and roll it back to it"""
+        for key, output in manifest['outputs'].items():
+            version = int(key)
+            path = os.path.join(self.output_dir, output['path'])
+            digest = _records_digest(path, version, output['records'])
+            if digest.hexdigest() != output['sha256']:
+                raise ValueError(f"{path} does not match its checkpoint hash")
+            writer = SymbolStoreWriter(path, version)
+            writer.truncate(output['records'])
+            self._writers[version] = writer
+            self._digests[version] = digest
+
+    def _checkpoint(self, manifest: dict, next_row: int, input_offset: int,
+                    complete: bool = False) -> None:
+        for writer in self._writers.values():
+            writer.flush(sync=True)
+            if complete:
+                writer.close()
+        manifest['next_row'] = next_row
+        manifest['input_offset'] = input_offset
+        manifest['outputs'] = {
+            str(version): {
+                'path': os.path.basename(writer.path),
+                'records': len(writer),
+                'bytes': HEADER.size + len(writer) * writer.record_size,
+                'sha256': self._digests[version].hexdigest(),
+            }
+            for version, writer in sorted(self._writers.items())
+        }
+        manifest['rows_done'] = sum(len(writer) for writer in self._writers.values())
+        manifest['complete'] = complete
+        _write_manifest(self.manifest_path, manifest)
+
+    def _write_symbols(self, manifest: dict, rows: List[int], payloads: List[Payload],
+                       generator: QRCodeGenerator) -> None:
+        try:
+            symbols = generator.generate_batch(payloads, self.ec_level, version=self.version)
+        except ValueError:
+            # Skip the rows that cannot be encoded (e.g. too large) and record
+            # them, so that one bad row cannot stop the shard on every resume
+            kept_rows, kept_payloads = [], []
+            for row, payload in zip(rows, payloads):
+                try:
+                    generator.encode(payload, self.ec_level, version=self.version)
+                except ValueError as exc:
+                    manifest['failed_rows'].append({'row': row, 'error': str(exc)})
+                else:
+                    kept_rows.append(row)
+                    kept_payloads.append(payload)
+            rows = kept_rows
+            symbols = generator.generate_batch(kept_payloads, self.ec_level, version=self.version)
+        for row, symbol in zip(rows, symbols):
+            payload = symbol.to_bytes()
+            self._writer(symbol.version).append_record(payload, row)
+            self._digests[symbol.version].update(SEQUENCE.pack(row) + payload)
+
+    def run(self) -> dict:
+        """Process the shard to the end of the input; returns the final manifest"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        input_sha256 = file_sha256(self.input_path)
+        if os.path.exists(self.manifest_path):
+            manifest = load_manifest(self.manifest_path)
+            self._check_manifest(manifest, input_sha256)
+            if manifest['complete']:
+                return manifest
+            manifest.setdefault('failed_rows', [])
+            self._restore_outputs(manifest)
+        else:
+            manifest = self._new_manifest(input_sha256)
+        generator = QRCodeGenerator(self.engine, verbose=False)
+
+        row = manifest['next_row']
+        rows: List[int] = []
+        payloads: List[Payload] = []
+        try:
+            with open(self.input_path, 'rb') as source:
+                source.seek(manifest['input_offset'])
+                for line in iter(source.readline, b''):
+                    if row % self.num_shards == self.shard:
+                        rows.append(row)
+                        payloads.append(_decode_row(line))
+                    row += 1
+                    if len(rows) >= self.checkpoint_every:
+                        self._write_symbols(manifest, rows, payloads, generator)
+                        self._checkpoint(manifest, row, source.tell())
+                        rows, payloads = [], []
+                if rows:
+                    self._write_symbols(manifest, rows, payloads, generator)
+                self._checkpoint(manifest, row, source.tell(), complete=True)
+        finally:
+            for writer in self._writers.values():
+                writer.close()
+        return manifest
+
+
+def run_shard(input_path: str, output_dir: str, shard: int = 0, num_shards: int = 1,
+              ec_level: str = 'M', version: Optional[int] = None,
+              checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+              engine: EngineSpec = None) -> dict:
+    return ShardJob(input_path, output_dir, shard, num_shards, ec_level, version,
+                    checkpoint_every, engine).run()
+
+
+def merge_shards(output_dir: str, destination: str) -> Dict[int, str]:
+    """Check all shard manifests and concatenate their stores; returns version -> merged path"""
+    paths = sorted(glob.glob(os.path.join(output_dir, 'shard-*-of-*.manifest.json')))
+    if not paths:
+        raise ValueError(f"No shard manifests found in {output_dir}")
+    manifests = [load_manifest(path) for path in paths]
+    first = manifests[0]
+    num_shards = first['num_shards']
+    for path, manifest in zip(paths, manifests):
+        for key in ('input_sha256', 'num_shards', 'ec_level', 'version'):
+            if manifest[key] != first[key]:
+                raise ValueError(f"{path} belongs to a different job ({key} differs)")
+        if not manifest['complete']:
+            raise ValueError(f"Shard {manifest['shard']}/{num_shards} is not complete")
+    shards = sorted(manifest['shard'] for manifest in manifests)
+    if shards != list(range(num_shards)):
+        missing = sorted(set(range(num_shards)) - set(shards))
+        raise ValueError(f"Missing shard manifests: {', '.join(map(str, missing))} of {num_shards}")
+
+    os.makedirs(destination, exist_ok=True)
+    writers: Dict[int, SymbolStoreWriter] = {}
+    merged: Dict[int, str] = {}
+    try:
+        for manifest in sorted(manifests, key=lambda m: m['shard']):
+            for key, output in sorted(manifest['outputs'].items(), key=lambda item: int(item[0])):
+                version = int(key)
+                path = os.path.join(output_dir, output['path'])
+                if _records_digest(path, version, output['records']).hexdigest() != output['sha256']:
+                    raise ValueError(f"{path} does not match its manifest hash")
+                writer = writers.get(version)
+                if writer is None:
+                    merged[version] = os.path.join(destination, f"v{version}.qrs")
+                    if os.path.exists(merged[version]):
+                        os.remove(merged[version])
+                    writer = writers[version] = SymbolStoreWriter(merged[version], version)
+                with SymbolStore(path) as store:
+                    for sequence in store:
+                        with store.record_bytes(sequence) as record:
+                            writer.append_record(record, sequence)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return merged
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sharded, resumable QR batch generation")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="generate (or resume) one shard")
+    run.add_argument('input', help="text file, one payload per line")
+    run.add_argument('output_dir')
+    run.add_argument('--shard', default='0/1', help="i/N, 0-based shard index (default: 0/1)")
+    run.add_argument('--ec-level', default='M', choices=EC_LEVELS)
+    run.add_argument('--version', type=int)
+    run.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY)
+    run.add_argument('--engine')
+    merge = commands.add_parser('merge', help="check and concatenate completed shards")
+    merge.add_argument('output_dir')
+    merge.add_argument('destination')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'run':
+            shard, num_shards = parse_shard(args.shard)
+            manifest = run_shard(args.input, args.output_dir, shard, num_shards, args.ec_level,
+                                 args.version, args.checkpoint_every, args.engine)
+            print(f"{shard_name(shard, num_shards)}: {manifest['rows_done']} symbols, "
+                  f"{len(manifest['outputs'])} store(s)")
+            for failure in manifest.get('failed_rows', []):
+                print(f"row {failure['row']} skipped: {failure['error']}", file=sys.stderr)
+        else:
+            for version, path in sorted(merge_shards(args.output_dir, args.destination).items()):
+                with SymbolStore(path) as store:
+                    print(f"version {version}: {len(store)} symbols -> {path}")
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Reference-vs-engine conformance harness
+
+Generates randomized payloads for every requested version, mode and EC level
+and checks that each engine produces a symbol bit-identical to the reference
+engine (same modules, same mask).
+
+Usage: python -m qrgenerator.qr_conformance [--engines fast,numpy] [--versions 1-40]
+                                            [--samples N] [--seed S]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .qr_encoder import (
+    QREncoder, MODE_NUMERIC, MODE_ALPHANUMERIC, MODE_BYTE, ALPHANUMERIC_CHARSET,
+)
+from .qr_engines import REFERENCE_ENGINE, STAGES, engine_names, resolve_engines
+from .qr_generator import QRCodeGenerator
+from .qr_matrix import EC_LEVELS
+from .qr_structure import DATA_CAPACITY
+
+MODES = {
+    'numeric': (MODE_NUMERIC, '', '0123456789'),
+    'alphanumeric': (MODE_ALPHANUMERIC, 'A', ALPHANUMERIC_CHARSET),
+    'byte': (MODE_BYTE, 'a', 'abcxyz0123456789 -_/?&=αβγδ✓'),
+}
+BITS_PER_BYTE = 8
+
+Mismatch = Tuple[str, int, str, str, str]
+
+
+def random_payload(rng: random.Random, mode_name: str, version: int,
+                   ec_level: str, encoder: QREncoder) -> str:
+    """Random payload of the given mode that fits the version, up to full capacity"""
+    mode, prefix, alphabet = MODES[mode_name]
+    capacity_bits = DATA_CAPACITY[(version, ec_level)] * BITS_PER_BYTE
+    length = rng.randint(1, max(1, capacity_bits // 3))
+    payload = prefix + ''.join(rng.choice(alphabet) for _ in range(length))
+    while len(payload) > 1 and len(encoder.encode(payload, version, mode)) > capacity_bits:
+        payload = payload[:max(1, len(payload) * 9 // 10)]
+    return payload
+
+
+def _generate_quietly(generator: QRCodeGenerator, payload: str, ec_level: str, version: int):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generator.generate(payload, ec_level, version=version)
+
+
+def run_conformance(engines: Optional[Sequence[str]] = None,
+                    versions: Iterable[int] = range(1, 41),
+                    ec_levels: Sequence[str] = EC_LEVELS,
+                    modes: Sequence[str] = tuple(MODES),
+                    samples: int = 1, seed: int = 0) -> Tuple[int, List[Mismatch]]:
+    """Return (symbols checked, mismatches as (engine, version, ec, mode, payload))"""
+    if engines is None:
+        engines = [name for name in engine_names() if name != REFERENCE_ENGINE]
+    rng = random.Random(seed)
+    reference = QRCodeGenerator(REFERENCE_ENGINE)
+    candidates = [(name, QRCodeGenerator(name)) for name in engines]
+    checked = 0
+    mismatches = []
+    for version in versions:
+        for ec_level in ec_levels:
+            for mode_name in modes:
+                for _ in range(samples):
+                    payload = random_payload(rng, mode_name, version, ec_level, reference.encoder)
+                    expected = _generate_quietly(reference, payload, ec_level, version)
+                    for name, generator in candidates:
+                        actual = _generate_quietly(generator, payload, ec_level, version)
+                        checked += 1
+                        if (actual.matrix != expected.matrix
+                                or actual.mask_pattern != expected.mask_pattern):
+                            mismatches.append((name, version, ec_level, mode_name, payload))
+    return checked, mismatches
+
+
+def _parse_versions(text: str) -> List[int]:
+    versions = []
+    for part in text.split(','):
+        if '-' in part:
+            start, end = part.split('-', 1)
+            versions.extend(range(int(start), int(end) + 1))
+        else:
+            versions.append(int(part))
+    return versions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check engines against the reference engine")
+    parser.add_argument('--engines', help="comma-separated engine names (default: all)")
+    parser.add_argument('--versions', default='1-40', help="e.g. 1-10 or 1,5,40")
+    parser.add_argument('--ec-levels', default=''.join(EC_LEVELS))
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--samples', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    engines = args.engines.split(',') if args.engines else None
+    for name in engines or [n for n in engine_names() if n != REFERENCE_ENGINE]:
+        resolved = resolve_engines(name)
+        print(f"{name}: " + ', '.join(f"{stage}={resolved[stage]}" for stage in STAGES))
+    checked, mismatches = run_conformance(
+        engines, _parse_versions(args.versions), tuple(args.ec_levels),
+        args.modes.split(','), args.samples, args.seed,
+    )
+    for name, version, ec_level, mode_name, payload in mismatches:
+        print(f"MISMATCH engine={name} version={version} ec={ec_level} "
+              f"mode={mode_name} payload={payload!r}")
+    print(f"{checked} symbols checked, {len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,13 +2,17 @@
 QR Code Data Encoding - Κωδικοποίηση Δεδομένων QR
 """
 
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
+
+# Payloads may be text or any bytes-like object (bytes, bytearray, memoryview)
+Payload = Union[str, bytes, bytearray, memoryview]
 
 # Mode constants
 MODE_NUMERIC = 0b0001
 MODE_ALPHANUMERIC = 0b0010
 MODE_BYTE = 0b0100
 MODE_KANJI = 0b1000
+MODE_STRUCTURED_APPEND = 0b0011
 
 MODE_INDICATOR_BITS = 4
 BITS_PER_BYTE = 8
@@ -18,22 +22,73 @@ ALPHANUMERIC_MULTIPLIER = 45
 TERMINATOR_MAX_BITS = 4
 PADDING_BYTE_1 = 0b11101100
 PADDING_BYTE_2 = 0b00010001
+STRUCTURED_APPEND_MAX_SYMBOLS = 16
+STRUCTURED_APPEND_FIELD_BITS = 4
+STRUCTURED_APPEND_PARITY_BITS = 8
 
 ALPHANUMERIC_CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+ALPHANUMERIC_MAP = {c: i for i, c in enumerate(ALPHANUMERIC_CHARSET)}
+
+# Character classes for single-pass mode detection. Text is matched
+# case-insensitively (alphanumeric mode upper-cases it); bytes exactly.
+NUMERIC_CHARS = frozenset('0123456789')
+ALPHANUMERIC_CHARS = frozenset(ALPHANUMERIC_CHARSET + ALPHANUMERIC_CHARSET.lower())
+NUMERIC_BYTES = frozenset(b'0123456789')
+ALPHANUMERIC_BYTES = frozenset(ALPHANUMERIC_CHARSET.encode('ascii'))
+
+# MSB-first bit lists for every byte value
+BYTE_BITS = tuple(
+    tuple((value >> shift) & 1 for shift in range(BITS_PER_BYTE - 1, -1, -1))
+    for value in range(256)
+)
 
 
 class QREncoder:
     def __init__(self):
-        self.alphanumeric_map = {c: i for i, c in enumerate(ALPHANUMERIC_CHARSET)}
+        self.alphanumeric_map = ALPHANUMERIC_MAP
 
-    def detect_mode(self, data: str) -> int:
-        if all(c.isdigit() for c in data):
+    def detect_mode(self, data: Payload) -> int:
+        if isinstance(data, str):
+            numeric, alphanumeric = NUMERIC_CHARS, ALPHANUMERIC_CHARS
+            symbols = set(data)
+        else:
+            numeric, alphanumeric = NUMERIC_BYTES, ALPHANUMERIC_BYTES
+            symbols = set(self.as_byte_view(data))
+        if symbols <= numeric:
             return MODE_NUMERIC
-        elif all(c in ALPHANUMERIC_CHARSET for c in data.upper()):
+        elif symbols <= alphanumeric:
             return MODE_ALPHANUMERIC
         else:
             return MODE_BYTE
 
+    @staticmethod
+    def as_byte_view(data: Union[bytes, bytearray, memoryview]) -> memoryview:
+        view = memoryview(data)
+        return view if view.format == 'B' and view.ndim == 1 else view.cast('B')
+
+    def prepare(self, data: Payload, mode: int) -> Payload:
+        """Normalize a payload once for the given mode.
+
+        Text in byte mode is UTF-8 encoded; bytes-like payloads in numeric or
+        alphanumeric mode become ASCII text. Byte-mode bytes-like payloads are
+        returned as a flat memoryview, without copying.
+        """
+        if isinstance(data, str):
+            return data.encode('utf-8') if mode == MODE_BYTE else data
+        view = self.as_byte_view(data)
+        if mode == MODE_BYTE:
+            return view
+        return view.tobytes().decode('ascii')
+
+    def segment_bytes(self, data: Payload, mode: int) -> Union[bytes, memoryview]:
+        """The bytes a segment actually carries (alphanumeric text is upper-cased)"""
+        prepared = self.prepare(data, mode)
+        if mode == MODE_ALPHANUMERIC:
+            return prepared.upper().encode('ascii')
+        if mode == MODE_NUMERIC:
+            return prepared.encode('ascii')
+        return prepared
+
     def get_character_count_bits(self, mode: int, version: int) -> int:
         if version <= 9:
             if mode == MODE_NUMERIC:
@@ -82,12 +137,12 @@ class QREncoder:
                 bits.extend(self._to_bits(value, 6))
         return bits
 
-    def encode_byte(self, data: Union[str, bytes]) -> List[int]:
+    def encode_byte(self, data: Payload) -> List[int]:
         bits = []
         if isinstance(data, str):
             data = data.encode('utf-8')
-        for byte in data:
-            bits.extend(self._to_bits(byte, 8))
+        for byte in self.as_byte_view(data):
+            bits.extend(BYTE_BITS[byte])
         return bits
 
     def _to_bits(self, value: int, length: int) -> List[int]:
@@ -96,25 +151,48 @@ class QREncoder:
             bits.append((value >> i) & 1)
         return bits
 
-    def encode(self, data: str, version: int, mode: Optional[int] = None) -> List[int]:
-        mode = mode if mode is not None else self.detect_mode(data)
-        bits = self._build_header(mode, data, version)
-        bits.extend(self._encode_data_by_mode(mode, data))
+    def structured_append_header(self, index: int, total: int, parity: int) -> List[int]:
+        if not 1 <= total <= STRUCTURED_APPEND_MAX_SYMBOLS or not 0 <= index < total:
+            raise ValueError(f"Invalid Structured Append position {index + 1}/{total}")
+        bits = self._to_bits(MODE_STRUCTURED_APPEND, MODE_INDICATOR_BITS)
+        bits.extend(self._to_bits(index, STRUCTURED_APPEND_FIELD_BITS))
+        bits.extend(self._to_bits(total - 1, STRUCTURED_APPEND_FIELD_BITS))
+        bits.extend(self._to_bits(parity, STRUCTURED_APPEND_PARITY_BITS))
         return bits
 
-    def _build_header(self, mode: int, data: str, version: int) -> List[int]:
+    def structured_append_parity(self, data: Payload) -> int:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        parity = 0
+        for byte in self.as_byte_view(data):
+            parity ^= byte
+        return parity
+
+    def encode(self, data: Payload, version: int, mode: Optional[int] = None) -> List[int]:
+        mode = mode if mode is not None else self.detect_mode(data)
+        length, data_bits = self.encode_segment(self.prepare(data, mode), mode)
+        return self.segment_header(mode, length, version) + data_bits
+
+    def encode_segment(self, data: Payload, mode: int) -> Tuple[int, List[int]]:
+        """Character count and data bits of a prepared payload (version independent)"""
+        return self._get_data_length(mode, data), self._encode_data_by_mode(mode, data)
+
+    def segment_header(self, mode: int, length: int, version: int) -> List[int]:
         bits = self._to_bits(mode, MODE_INDICATOR_BITS)
-        count_bits = self.get_character_count_bits(mode, version)
-        data_length = self._get_data_length(mode, data)
-        bits.extend(self._to_bits(data_length, count_bits))
+        bits.extend(self._to_bits(length, self.get_character_count_bits(mode, version)))
         return bits
 
-    def _get_data_length(self, mode: int, data: str) -> int:
+    def _build_header(self, mode: int, data: Payload, version: int) -> List[int]:
+        return self.segment_header(mode, self._get_data_length(mode, data), version)
+
+    def _get_data_length(self, mode: int, data: Payload) -> int:
         if mode == MODE_BYTE and isinstance(data, str):
             return len(data.encode('utf-8'))
+        if isinstance(data, memoryview):
+            return data.nbytes
         return len(data)
 
-    def _encode_data_by_mode(self, mode: int, data: str) -> List[int]:
+    def _encode_data_by_mode(self, mode: int, data: Payload) -> List[int]:
         encoders = {
             MODE_NUMERIC: self.encode_numeric,
             MODE_ALPHANUMERIC: self.encode_alphanumeric,
@@ -0,0 +1,145 @@
+"""
+Pluggable engine registry for the generation stages
+
+Each stage ("rs", "placement", "masking") has interchangeable implementations
+registered by name. The readable implementations (GaloisField/Polynomial
+Reed-Solomon, interleave + QRMatrix.place_data, per-mask QRMatrix penalty
+scoring) are the "reference" engine; faster ones must stay bit-identical to it.
+
+Engines are chosen per QRCodeGenerator (``engine=``) or through the
+QRGENERATOR_ENGINE environment variable, either as one name for every stage
+("numpy") or per stage ("rs=fast,masking=reference"). A stage without an
+implementation for the requested engine falls back numpy -> fast -> reference.
+"""
+
+import os
+from typing import Callable, Dict, List, Mapping, Optional, Union
+
+from .reed_solomon import ReedSolomon, FastReedSolomon
+
+ENGINE_ENV_VAR = 'QRGENERATOR_ENGINE'
+STAGES = ('rs', 'placement', 'masking')
+DEFAULT_ENGINE = 'fast'
+REFERENCE_ENGINE = 'reference'
+ENGINE_FALLBACKS = {'numpy': 'fast', 'fast': 'reference'}
+
+EngineSpec = Union[None, str, Mapping[str, str]]
+
+# stage -> engine name -> (implementation, availability check)
+_REGISTRY: Dict[str, Dict[str, tuple]] = {stage: {} for stage in STAGES}
+
+
+def register_engine(stage: str, name: str, implementation: Callable,
+                    available: Optional[Callable[[], bool]] = None) -> None:
+    """Register an implementation of one stage.
+
+    rs:        implementation() -> object with encode(data, ec_count)
+    placement: implementation(generator, data_codewords, version, ec_level) -> QRMatrix
+    masking:   implementation(generator, matrix, version, ec_level) -> QRMatrix
+    """
+    if stage not in _REGISTRY:
+        raise ValueError(f"Unknown stage {stage!r} (expected one of {', '.join(STAGES)})")
+    _REGISTRY[stage][name] = (implementation, available)
+
+
+def is_available(stage: str, name: str) -> bool:
+    entry = _REGISTRY[stage].get(name)
+    if entry is None:
+        return False
+    available = entry[1]
+    return available is None or available()
+
+
+def available_engines(stage: str) -> List[str]:
+    return [name for name in _REGISTRY[stage] if is_available(stage, name)]
+
+
+def engine_names() -> List[str]:
+    names = []
+    for stage in STAGES:
+        for name in _REGISTRY[stage]:
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def _parse_spec(spec: EngineSpec) -> Dict[str, str]:
+    if spec is None:
+        spec = os.environ.get(ENGINE_ENV_VAR) or DEFAULT_ENGINE
+    if isinstance(spec, str):
+        if '=' not in spec:
+            return {stage: spec.strip() for stage in STAGES}
+        pairs = []
+        for item in spec.split(','):
+            if not item.strip():
+                continue
+            if '=' not in item:
+                raise ValueError(f"Engine spec items must look like stage=name, got {item.strip()!r}")
+            pairs.append(item.split('=', 1))
+        spec = {stage.strip(): name.strip() for stage, name in pairs}
+    requested = {stage: DEFAULT_ENGINE for stage in STAGES}
+    for stage, name in spec.items():
+        if stage not in _REGISTRY:
+            raise ValueError(f"Unknown stage {stage!r} (expected one of {', '.join(STAGES)})")
+        requested[stage] = name
+    return requested
+
+
+def resolve_engines(spec: EngineSpec = None) -> Dict[str, str]:
+    """Map every stage to the registered, available engine name to use"""
+    resolved = {}
+    known = engine_names()
+    for stage, name in _parse_spec(spec).items():
+        if name not in known:
+            raise ValueError(f"Unknown engine {name!r} (expected one of {', '.join(known)})")
+        while not is_available(stage, name):
+            name = ENGINE_FALLBACKS.get(name, REFERENCE_ENGINE)
+        resolved[stage] = name
+    return resolved
+
+
+def get_engine(stage: str, name: str) -> Callable:
+    return _REGISTRY[stage][name][0]
+
+
+def _numpy_available() -> bool:
+    from .qr_numpy import numpy_available
+    return numpy_available()
+
+
+def _place_reference(generator, data_codewords, version, ec_level):
+    final_codewords = generator._generate_error_correction(data_codewords, version, ec_level)
+    return generator._create_matrix_with_data(final_codewords, version)
+
+
+def _place_fast(generator, data_codewords, version, ec_level):
+    return generator._create_matrix_with_plan(data_codewords, version, ec_level)
+
+
+def _mask_reference(generator, matrix, version, ec_level):
+    return generator._select_best_mask(matrix, version, ec_level)
+
+
+def _mask_fast(generator, matrix, version, ec_level):
+    mask, penalty, rows = generator._mask_selector().select(matrix, ec_level)
+    generator._log(f"Best mask: {mask}, Penalty: {penalty}")
+    matrix.matrix = rows
+    matrix.invalidate_runs()
+    matrix.mask_pattern = mask
+    matrix.ec_level = ec_level
+    return matrix
+
+
+def _mask_numpy(generator, matrix, version, ec_level):
+    (mask, penalty), = generator._numpy_engine().select([matrix], [ec_level])
+    generator._log(f"Best mask: {mask}, Penalty: {penalty}")
+    return generator._finalize_mask(matrix, ec_level, mask)
+
+
+register_engine('rs', 'reference', ReedSolomon)
+register_engine('rs', 'fast', FastReedSolomon)
+register_engine('placement', 'reference', _place_reference)
+register_engine('placement', 'fast', _place_fast)
+register_engine('masking', 'reference', _mask_reference)
+register_engine('masking', 'fast', _mask_fast)
+register_engine('masking', 'numpy', _mask_numpy, available=_numpy_available)
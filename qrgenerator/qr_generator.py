@@ -2,54 +2,463 @@
 QR Code Generator core
 """
 
-from typing import Optional, List, Tuple
-from .qr_encoder import QREncoder
+from typing import TYPE_CHECKING, Dict, Optional, List, Sequence, Tuple, Union
+from .qr_encoder import QREncoder, Payload, STRUCTURED_APPEND_MAX_SYMBOLS
 from .qr_structure import select_version, DATA_CAPACITY
-from .reed_solomon import ReedSolomon, EC_CODEWORDS_TABLE
-from .qr_matrix import QRMatrix
+from .reed_solomon import EC_CODEWORDS_TABLE
+from .qr_matrix import EC_LEVELS, NUM_MASK_PATTERNS, QRMatrix
+from .qr_micro import (
+    MicroQREncoder, MicroQRMatrix, MICRO_VERSIONS, MICRO_DATA_BITS, MICRO_EC_CODEWORDS,
+    MICRO_EC_LEVELS, micro_version_name, parse_micro_version,
+)
+from .qr_layout import block_sizes, get_layout_plan
+from .qr_mask_select import BranchAndBoundMaskSelector
+from .qr_stages import EncodedData, CodewordBlocks, PlacedSymbol
+from .qr_engines import EngineSpec, REFERENCE_ENGINE, get_engine, resolve_engines
+from .qr_metrics import METRICS, timed
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from .qr_numpy import NumpyMaskEngine
 
 
 class QRCodeGenerator:
     MIN_VERSION = 1
     MAX_VERSION = 40
     BITS_PER_BYTE = 8
-    NUM_MASK_PATTERNS = 8
+    NUM_MASK_PATTERNS = NUM_MASK_PATTERNS
+    EC_LEVEL_ORDER = EC_LEVELS
 
-    def __init__(self):
+    def __init__(self, engine: EngineSpec = None, verbose: bool = True):
+        """``engine`` selects stage implementations (see qr_engines); defaults
+        to the QRGENERATOR_ENGINE environment variable, then "fast".
+        ``verbose=False`` silences the per-symbol progress lines."""
+        self.verbose = verbose
+        self.engines = resolve_engines(engine)
         self.encoder = QREncoder()
-        self.rs = ReedSolomon()
+        self.micro_encoder = MicroQREncoder()
+        self.rs = get_engine('rs', self.engines['rs'])()
+        self._place = get_engine('placement', self.engines['placement'])
+        self._mask = get_engine('masking', self.engines['masking'])
+        self._function_templates = {}
+        self._numpy_mask_engine = None
+        self._branch_and_bound = None
+
+    def __reduce__(self):
+        # Pickle by configuration, so bound stage methods can be sent to process pools
+        return (QRCodeGenerator, (self.engines, self.verbose))
+
+    def _log(self, message: str) -> None:
+        if self.verbose:
+            print(message)
+
+    def generate(
+        self, data: Payload, ec_level: str = 'M', version: Optional[int] = None,
+        min_version: Optional[int] = None, max_version: Optional[int] = None,
+        boost_ec: bool = False, micro: bool = False
+    ) -> QRMatrix:
+        """Generate a QR symbol from text or a bytes-like payload.
 
-    def generate(self, data: str, ec_level: str = 'M') -> QRMatrix:
+        Bytes, bytearray and memoryview payloads are encoded as given, without
+        copies or transcoding. ``version`` pins the symbol version; ``min_version``/``max_version``
+        bound the automatic search. With ``boost_ec`` the EC level is raised
+        as far as the data still fits the selected version. With ``micro`` a
+        Micro QR symbol (M2-M4) is returned when the data fits one at this EC
+        level and no version constraint is given.
+        """
         mode = self.encoder.detect_mode(data)
-        version, encoded_bits = self._encode_and_select_version(data, ec_level, mode)
+        if micro and version is None and min_version is None and max_version is None:
+            try:
+                fitted = self._encode_micro(data, ec_level, mode, MICRO_VERSIONS)
+            except ValueError:
+                fitted = None
+            if fitted is not None:
+                return self._generate_micro_fitted(fitted, boost_ec)
+        min_version, max_version = self._resolve_version_range(
+            version, min_version, max_version
+        )
+        version, encoded_bits = self._encode_and_select_version(
+            data, ec_level, mode, min_version, max_version
+        )
+        if boost_ec:
+            ec_level = self._boost_ec_level(encoded_bits, version, ec_level)
+        return self._build_symbol(encoded_bits, version, ec_level)
 
-        print(f"Selected version: {version}, EC: {ec_level}")
-        print(f"Data bits: {len(encoded_bits)}")
+    def encode(
+        self, data: Payload, ec_level: str = 'M', version: Optional[int] = None,
+        min_version: Optional[int] = None, max_version: Optional[int] = None,
+        boost_ec: bool = False
+    ) -> EncodedData:
+        """Stage 1: pick version (and boosted EC level) and build the padded data codewords.
 
-        data_codewords = self.encoder.bits_to_bytes(encoded_bits)
+        encode -> add_ec -> place -> mask yields the same symbol as generate().
+        """
+        mode = self.encoder.detect_mode(data)
+        min_version, max_version = self._resolve_version_range(
+            version, min_version, max_version
+        )
+        version, encoded_bits = self._encode_and_select_version(
+            data, ec_level, mode, min_version, max_version
+        )
+        if boost_ec:
+            ec_level = self._boost_ec_level(encoded_bits, version, ec_level)
+        encoded_bits = self._pad_to_capacity(encoded_bits, version, ec_level)
+        self._log(f"Selected version: {version}, EC: {ec_level}")
+        self._log(f"Data bits: {len(encoded_bits)}")
+        return EncodedData(version, ec_level, mode, bytes(self.encoder.bits_to_bytes(encoded_bits)))
+
+    @timed('rs')
+    def add_ec(self, encoded: EncodedData) -> CodewordBlocks:
+        """Stage 2: split the data codewords into blocks and compute their EC codewords"""
+        sizes, ec_per_block = block_sizes(encoded.version, encoded.ec_level)
+        if len(encoded.data) != sum(sizes):
+            raise ValueError(
+                f"Version {encoded.version}-{encoded.ec_level} needs {sum(sizes)} data codewords, "
+                f"got {len(encoded.data)}"
+            )
+        data_blocks = []
+        start = 0
+        for size in sizes:
+            data_blocks.append(encoded.data[start:start + size])
+            start += size
+        ec_blocks = [bytes(self.rs.encode(list(block), ec_per_block)) for block in data_blocks]
+        return CodewordBlocks(encoded.version, encoded.ec_level, tuple(data_blocks), tuple(ec_blocks))
+
+    def place(self, codewords: CodewordBlocks) -> PlacedSymbol:
+        """Stage 3: lay function patterns and codewords out in an unmasked symbol"""
+        version, ec_level = codewords.version, codewords.ec_level
+        sizes, ec_per_block = block_sizes(version, ec_level)
+        if ([len(block) for block in codewords.data_blocks] != sizes
+                or [len(block) for block in codewords.ec_blocks] != [ec_per_block] * len(sizes)):
+            raise ValueError(f"Codeword blocks do not match version {version}-{ec_level}")
+        if self.engines['placement'] == REFERENCE_ENGINE:
+            matrix = self._create_matrix_with_data(list(codewords.interleaved()), version)
+        else:
+            with METRICS.time('placement'):
+                matrix = self._clone_matrix(self._function_template(version), version)
+                get_layout_plan(version, ec_level).fill(
+                    matrix, codewords.data_blocks, codewords.ec_blocks
+                )
+        return PlacedSymbol.from_matrix(matrix, ec_level)
+
+    def mask(self, placed: PlacedSymbol, mask_pattern: Optional[int] = None) -> QRMatrix:
+        """Stage 4: apply the best mask (or ``mask_pattern``) and write format information"""
+        self._get_ec_info(placed.version, placed.ec_level)
+        if mask_pattern is not None and not 0 <= mask_pattern < self.NUM_MASK_PATTERNS:
+            raise ValueError(f"Invalid mask pattern {mask_pattern} (expected 0-{self.NUM_MASK_PATTERNS - 1})")
+        template = self._function_template(placed.version)
+        if len(placed.rows) != template.size or any(len(row) != template.size for row in placed.rows):
+            raise ValueError(
+                f"Placed symbol is not {template.size}x{template.size} as version {placed.version} requires"
+            )
+        matrix = self._clone_matrix(template, placed.version)
+        matrix.matrix = [list(row) for row in placed.rows]
+        matrix.invalidate_runs()
+        with METRICS.time('mask'):
+            if mask_pattern is None:
+                matrix = self._mask(self, matrix, placed.version, placed.ec_level)
+            else:
+                matrix = self._finalize_mask(matrix, placed.ec_level, mask_pattern)
+        return self._record_symbol(matrix)
+
+    def generate_micro(
+        self, data: Payload, ec_level: Optional[str] = None,
+        version: Optional[Union[int, str]] = None, boost_ec: bool = False
+    ) -> MicroQRMatrix:
+        """Generate a Micro QR symbol (M1-M4) in the smallest version that fits.
 
-        final_codewords = self._generate_error_correction(
-            data_codewords, version, ec_level
+        ``ec_level=None`` allows M1, which has error detection only; otherwise
+        L, M or Q. ``version`` pins the symbol ("M1"-"M4" or 1-4).
+        """
+        versions = MICRO_VERSIONS if version is None else (parse_micro_version(version),)
+        fitted = self._encode_micro(data, ec_level, self.encoder.detect_mode(data), versions)
+        return self._generate_micro_fitted(fitted, boost_ec)
+
+    @timed('encode')
+    def _encode_micro(
+        self, data: Payload, ec_level: Optional[str], mode: int, versions: Sequence[int]
+    ) -> Tuple[int, Optional[str], List[int]]:
+        """Return the smallest fitting (version, EC level, unpadded encoded bits)"""
+        if ec_level not in (None, 'L', 'M', 'Q'):
+            raise ValueError(f"Micro QR supports EC levels L, M and Q, not {ec_level}")
+        length, data_bits = self.micro_encoder.encode_segment(
+            self.micro_encoder.prepare(data, mode), mode
         )
+        for version in versions:
+            level = 'L' if ec_level is None and version > 1 else ec_level
+            if level not in MICRO_EC_LEVELS[version] or not self.micro_encoder.supports(mode, version):
+                continue
+            header = self.micro_encoder.segment_header(mode, length, version)
+            if len(header) + len(data_bits) <= MICRO_DATA_BITS[(version, level)]:
+                self._observe_payload(length)
+                return version, level, header + data_bits
+        names = '-'.join(sorted({micro_version_name(versions[0]), micro_version_name(versions[-1])}))
+        level = f"EC level {ec_level}" if ec_level else "error detection only"
+        raise ValueError(f"Data does not fit Micro QR {names} ({level})")
 
-        matrix = self._create_matrix_with_data(final_codewords, version)
+    def _generate_micro_fitted(
+        self, fitted: Tuple[int, Optional[str], List[int]], boost_ec: bool
+    ) -> MicroQRMatrix:
+        version, ec_level, encoded_bits = fitted
+        if boost_ec and ec_level is not None:
+            levels = MICRO_EC_LEVELS[version]
+            for candidate in levels[levels.index(ec_level) + 1:]:
+                if len(encoded_bits) > MICRO_DATA_BITS[(version, candidate)]:
+                    break
+                ec_level = candidate
+        return self._build_micro_symbol(encoded_bits, version, ec_level)
 
-        best_matrix = self._select_best_mask(matrix, version, ec_level)
+    def _build_micro_symbol(
+        self, encoded_bits: List[int], version: int, ec_level: Optional[str]
+    ) -> MicroQRMatrix:
+        bits = self.micro_encoder.add_micro_padding(encoded_bits, version, ec_level)
 
-        return best_matrix
+        self._log(f"Selected version: {micro_version_name(version)}, EC: {ec_level}")
+        self._log(f"Data bits: {len(bits)}")
+
+        # A 4-bit final codeword (M1, M3) enters Reed-Solomon as its high nibble
+        data_codewords = self.encoder.bits_to_bytes(bits + [0] * (-len(bits) % self.BITS_PER_BYTE))
+        with METRICS.time('rs'):
+            ec_codewords = self.rs.encode(data_codewords, MICRO_EC_CODEWORDS[(version, ec_level)])
+        with METRICS.time('placement'):
+            matrix = self._clone_matrix(self._function_template(version, MicroQRMatrix), version)
+            matrix.place_data(bits + self._codewords_to_bits(ec_codewords))
+
+        best = None
+        with METRICS.time('mask'):
+            for mask in range(MicroQRMatrix.NUM_MASK_PATTERNS):
+                candidate = self._clone_matrix(matrix, version)
+                candidate.apply_mask(mask)
+                score = candidate.evaluate_score()
+                if best is None or score > best[2]:
+                    best = (candidate, mask, score)
+        best_matrix, best_mask, best_score = best
+        self._log(f"Best mask: {best_mask}, Score: {best_score}")
+        best_matrix.add_format_information(ec_level, best_mask)
+        best_matrix.mask_pattern = best_mask
+        best_matrix.ec_level = ec_level
+        return self._record_symbol(best_matrix)
+
+    def generate_structured_append(
+        self, data: Payload, ec_level: str = 'M', max_version: int = MAX_VERSION,
+        executor: Optional['Executor'] = None, max_workers: Optional[int] = None
+    ) -> List[QRMatrix]:
+        """Split data into up to 16 Structured Append symbols of at most max_version.
+
+        Parts are generated concurrently on ``executor`` (a process pool is
+        created when none is given). Symbols are returned in sequence order.
+        """
+        self._resolve_version_range(None, None, max_version)
+        if not isinstance(data, str):
+            # Parts are pickled to worker processes, so one bytes copy is unavoidable
+            data = self.encoder.as_byte_view(data).tobytes()
+        parts = self._split_for_structured_append(data, ec_level, max_version)
+        if len(parts) == 1:
+            return [self.generate(data, ec_level, max_version=max_version)]
+        # Parity covers the data as encoded, e.g. after alphanumeric upper-casing
+        parity = 0
+        for part in parts:
+            parity ^= self.encoder.structured_append_parity(
+                self.encoder.segment_bytes(part, self.encoder.detect_mode(part))
+            )
+        jobs = [
+            ((self.engines, self.verbose), part, index, len(parts), parity, ec_level, max_version)
+            for index, part in enumerate(parts)
+        ]
+        if executor is not None:
+            return list(executor.map(_generate_structured_part, jobs))
+        # Imported here: multiprocessing is costly to load and rarely needed
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(_generate_structured_part, jobs))
+
+    def _split_for_structured_append(
+        self, data: Payload, ec_level: str, max_version: int
+    ) -> List[Payload]:
+        for count in range(1, STRUCTURED_APPEND_MAX_SYMBOLS + 1):
+            chunk = -(-len(data) // count)
+            parts = [data[i:i + chunk] for i in range(0, len(data), chunk)] or [data]
+            if all(self._fits_structured_part(part, ec_level, max_version) for part in parts):
+                return parts
+        raise ValueError(
+            f"Data too large for {STRUCTURED_APPEND_MAX_SYMBOLS} symbols "
+            f"of version {max_version} at EC level {ec_level}"
+        )
+
+    def _fits_structured_part(self, part: Payload, ec_level: str, max_version: int) -> bool:
+        header = self.encoder.structured_append_header(0, STRUCTURED_APPEND_MAX_SYMBOLS, 0)
+        bits = self.encoder.encode(part, max_version, self.encoder.detect_mode(part))
+        return len(header) + len(bits) <= self._capacity_bits(max_version, ec_level)
+
+    def _generate_structured_part(
+        self, part: Payload, index: int, total: int, parity: int,
+        ec_level: str, max_version: int
+    ) -> QRMatrix:
+        header = self.encoder.structured_append_header(index, total, parity)
+        version, encoded_bits = self._encode_and_select_version(
+            part, ec_level, self.encoder.detect_mode(part),
+            self.MIN_VERSION, max_version, prefix_bits=header
+        )
+        return self._build_symbol(encoded_bits, version, ec_level)
+
+    def generate_batch(
+        self, payloads: Sequence[Payload], ec_level: str = 'M',
+        version: Optional[int] = None, min_version: Optional[int] = None,
+        max_version: Optional[int] = None, use_numpy: Optional[bool] = None
+    ) -> List[QRMatrix]:
+        """Generate many symbols, selecting masks in vectorized batches when possible.
 
+        ``use_numpy=None`` uses the NumPy engine if it is installed (unless the
+        reference masking engine was requested) and falls back to per-symbol
+        selection otherwise. The chosen masks are identical either way.
+        """
+        min_version, max_version = self._resolve_version_range(
+            version, min_version, max_version
+        )
+        placed = []
+        for data in payloads:
+            mode = self.encoder.detect_mode(data)
+            symbol_version, encoded_bits = self._encode_and_select_version(
+                data, ec_level, mode, min_version, max_version
+            )
+            placed.append(self._place_symbol(encoded_bits, symbol_version, ec_level))
+        # Imported here so plain generate() never pays for loading NumPy
+        from .qr_numpy import numpy_available
+        if use_numpy is None:
+            use_numpy = self.engines['masking'] != REFERENCE_ENGINE and numpy_available()
+        if not use_numpy:
+            results = []
+            for matrix in placed:
+                with METRICS.time('mask'):
+                    results.append(self._record_symbol(
+                        self._mask(self, matrix, matrix.version, ec_level)
+                    ))
+            return results
+        engine = self._numpy_engine()
+        results: List[Optional[QRMatrix]] = [None] * len(placed)
+        by_version: Dict[int, List[int]] = {}
+        for index, matrix in enumerate(placed):
+            by_version.setdefault(matrix.version, []).append(index)
+        for indices in by_version.values():
+            group = [placed[i] for i in indices]
+            # One observation per vectorized call, not per symbol
+            with METRICS.time('mask'):
+                choices = engine.select(group, [ec_level] * len(group))
+                for index, matrix, (mask, _) in zip(indices, group, choices):
+                    results[index] = self._record_symbol(
+                        self._finalize_mask(matrix, ec_level, mask)
+                    )
+        return results
+
+    def _mask_selector(self) -> 'BranchAndBoundMaskSelector':
+        if self._branch_and_bound is None:
+            self._branch_and_bound = BranchAndBoundMaskSelector()
+        return self._branch_and_bound
+
+    def _numpy_engine(self) -> 'NumpyMaskEngine':
+        if self._numpy_mask_engine is None:
+            from .qr_numpy import NumpyMaskEngine
+            self._numpy_mask_engine = NumpyMaskEngine()
+        return self._numpy_mask_engine
+
+    def _finalize_mask(self, matrix: QRMatrix, ec_level: str, mask: int) -> QRMatrix:
+        matrix.apply_mask(mask)
+        matrix.add_format_information(ec_level, mask)
+        matrix.mask_pattern = mask
+        matrix.ec_level = ec_level
+        return matrix
+
+    def _build_symbol(self, encoded_bits: List[int], version: int, ec_level: str) -> QRMatrix:
+        matrix = self._place_symbol(encoded_bits, version, ec_level)
+        with METRICS.time('mask'):
+            matrix = self._mask(self, matrix, version, ec_level)
+        return self._record_symbol(matrix)
+
+    def _record_symbol(self, matrix: QRMatrix) -> QRMatrix:
+        if METRICS.enabled:
+            METRICS.inc('qr_codes_generated_total', (
+                str(getattr(matrix, 'name', matrix.version)), matrix.ec_level or 'none'
+            ))
+        return matrix
+
+    def _place_symbol(self, encoded_bits: List[int], version: int, ec_level: str) -> QRMatrix:
+        """Pad, EC-encode and place data; the result is not yet masked"""
+        encoded_bits = self._pad_to_capacity(encoded_bits, version, ec_level)
+
+        self._log(f"Selected version: {version}, EC: {ec_level}")
+        self._log(f"Data bits: {len(encoded_bits)}")
+
+        data_codewords = self.encoder.bits_to_bytes(encoded_bits)
+
+        return self._place(self, data_codewords, version, ec_level)
+
+    def _resolve_version_range(
+        self, version: Optional[int], min_version: Optional[int],
+        max_version: Optional[int]
+    ) -> Tuple[int, int]:
+        if version is not None:
+            if min_version is not None or max_version is not None:
+                raise ValueError("Pass either version or min_version/max_version, not both")
+            min_version = max_version = version
+        min_version = self.MIN_VERSION if min_version is None else min_version
+        max_version = self.MAX_VERSION if max_version is None else max_version
+        if not self.MIN_VERSION <= min_version <= max_version <= self.MAX_VERSION:
+            raise ValueError(
+                f"Invalid version range {min_version}-{max_version} "
+                f"(supported: {self.MIN_VERSION}-{self.MAX_VERSION})"
+            )
+        return min_version, max_version
+
+    def _capacity_bits(self, version: int, ec_level: str) -> int:
+        return DATA_CAPACITY.get((version, ec_level), 0) * self.BITS_PER_BYTE
+
+    @timed('encode')
     def _encode_and_select_version(
-        self, data: str, ec_level: str, mode: int
+        self, data: Payload, ec_level: str, mode: int,
+        min_version: int = MIN_VERSION, max_version: int = MAX_VERSION,
+        prefix_bits: Optional[List[int]] = None
     ) -> Tuple[int, List[int]]:
-        for version in range(self.MIN_VERSION, self.MAX_VERSION + 1):
-            encoded_bits = self.encoder.encode(data, version, mode)
-            capacity_bytes = DATA_CAPACITY.get((version, ec_level), 0)
-            capacity_bits = capacity_bytes * self.BITS_PER_BYTE
-            if len(encoded_bits) <= capacity_bits:
-                padded_bits = self.encoder.add_padding(encoded_bits, capacity_bits)
-                return version, padded_bits
-        raise ValueError("Data too large for supported versions")
+        """Return the smallest fitting version and the unpadded encoded bits"""
+        # The data bits do not depend on the version; only the header does
+        length, data_bits = self.encoder.encode_segment(
+            self.encoder.prepare(data, mode), mode
+        )
+        prefix_bits = prefix_bits or []
+        for version in range(min_version, max_version + 1):
+            header = self.encoder.segment_header(mode, length, version)
+            total_bits = len(prefix_bits) + len(header) + len(data_bits)
+            if total_bits <= self._capacity_bits(version, ec_level):
+                self._observe_payload(length)
+                return version, prefix_bits + header + data_bits
+        if min_version == self.MIN_VERSION and max_version == self.MAX_VERSION:
+            raise ValueError("Data too large for supported versions")
+        if min_version == max_version:
+            raise ValueError(
+                f"Data too large for version {min_version} at EC level {ec_level}"
+            )
+        raise ValueError(
+            f"Data too large for versions {min_version}-{max_version} "
+            f"at EC level {ec_level}"
+        )
+
+    @staticmethod
+    def _observe_payload(length: int) -> None:
+        # The character count of every supported mode is the payload's byte length
+        if METRICS.enabled:
+            METRICS.observe('qr_payload_bytes', length)
 
+    def _boost_ec_level(self, encoded_bits: List[int], version: int, ec_level: str) -> str:
+        start = self.EC_LEVEL_ORDER.index(ec_level)
+        for candidate in self.EC_LEVEL_ORDER[start + 1:]:
+            if len(encoded_bits) > self._capacity_bits(version, candidate):
+                break
+            ec_level = candidate
+        return ec_level
+
+    def _pad_to_capacity(self, encoded_bits: List[int], version: int, ec_level: str) -> List[int]:
+        return self.encoder.add_padding(encoded_bits, self._capacity_bits(version, ec_level))
+
+    @timed('rs')
     def _generate_error_correction(
         self, data_codewords: List[int], version: int, ec_level: str
     ) -> List[int]:
@@ -57,7 +466,7 @@ class QRCodeGenerator:
         ec_per_block, blocks_g1, blocks_g2, _ = ec_info
         if self._is_single_block(blocks_g1, blocks_g2):
             return self._encode_single_block(data_codewords, ec_per_block)
-        return self._encode_multi_blocks(data_codewords, ec_per_block, blocks_g1, blocks_g2)
+        return self._encode_multi_blocks(data_codewords, version, ec_level)
 
     def _get_ec_info(self, version: int, ec_level: str) -> tuple:
         ec_info = EC_CODEWORDS_TABLE.get((version, ec_level))
@@ -73,29 +482,25 @@ class QRCodeGenerator:
         return data + ec_codewords
 
     def _encode_multi_blocks(
-        self, data_codewords: List[int], ec_per_block: int,
-        blocks_g1: int, blocks_g2: int
+        self, data_codewords: List[int], version: int, ec_level: str
     ) -> List[int]:
-        total_blocks = blocks_g1 + blocks_g2
-        block_size = len(data_codewords) // total_blocks
-        data_blocks, ec_blocks = self._create_blocks(
-            data_codewords, block_size, total_blocks, ec_per_block
-        )
+        sizes, ec_per_block = block_sizes(version, ec_level)
+        data_blocks, ec_blocks = self._create_blocks(data_codewords, sizes, ec_per_block)
         final_codewords = self._interleave_blocks(data_blocks, ec_blocks)
         return final_codewords
 
     def _create_blocks(
-        self, data: List[int], block_size: int, total_blocks: int, ec_count: int
+        self, data: List[int], sizes: List[int], ec_count: int
     ) -> Tuple[List[List[int]], List[List[int]]]:
         data_blocks = []
         ec_blocks = []
-        for i in range(total_blocks):
-            start = i * block_size
-            end = min(start + block_size, len(data))
-            block_data = data[start:end]
+        start = 0
+        for size in sizes:
+            block_data = data[start:start + size]
             block_ec = self.rs.encode(block_data, ec_count)
             data_blocks.append(block_data)
             ec_blocks.append(block_ec)
+            start += size
         return data_blocks, ec_blocks
 
     def _interleave_blocks(self, data_blocks: List[List[int]], ec_blocks: List[List[int]]) -> List[int]:
@@ -112,13 +517,36 @@ class QRCodeGenerator:
                     result.append(block[i])
         return result
 
+    def _create_matrix_with_plan(
+        self, data_codewords: List[int], version: int, ec_level: str
+    ) -> QRMatrix:
+        """Split, EC-encode and place codewords in one pass via the cached layout plan"""
+        plan = get_layout_plan(version, ec_level)
+        data_blocks = plan.split_blocks(data_codewords)
+        with METRICS.time('rs'):
+            ec_blocks = [self.rs.encode(block, plan.ec_per_block) for block in data_blocks]
+        with METRICS.time('placement'):
+            matrix = self._clone_matrix(self._function_template(version), version)
+            plan.fill(matrix, data_blocks, ec_blocks)
+        return matrix
+
+    @timed('placement')
     def _create_matrix_with_data(self, codewords: List[int], version: int) -> QRMatrix:
         bits = self._codewords_to_bits(codewords)
-        matrix = QRMatrix(version)
-        matrix.build_function_patterns()
+        matrix = self._clone_matrix(self._function_template(version), version)
         matrix.place_data(bits)
         return matrix
 
+    def _function_template(self, version: int, matrix_class: type = QRMatrix) -> QRMatrix:
+        """Function patterns are identical per version, so build them once"""
+        template = self._function_templates.get((matrix_class, version))
+        METRICS.cache_lookup('function_template', template is not None)
+        if template is None:
+            template = matrix_class(version)
+            template.build_function_patterns()
+            self._function_templates[(matrix_class, version)] = template
+        return template
+
     def _codewords_to_bits(self, codewords: List[int]) -> List[int]:
         bits = []
         for codeword in codewords:
@@ -132,8 +560,9 @@ class QRCodeGenerator:
             for mask in range(self.NUM_MASK_PATTERNS)
         ]
         best_matrix, best_mask, best_penalty = min(masks_with_scores, key=lambda x: x[2])
-        print(f"Best mask: {best_mask}, Penalty: {best_penalty}")
+        self._log(f"Best mask: {best_mask}, Penalty: {best_penalty}")
         best_matrix.mask_pattern = best_mask
+        best_matrix.ec_level = ec_level
         return best_matrix
 
     def _evaluate_mask(self, base_matrix: QRMatrix, version: int, ec_level: str, mask: int) -> Tuple[QRMatrix, int, int]:
@@ -144,7 +573,13 @@ class QRCodeGenerator:
         return test_matrix, mask, penalty
 
     def _clone_matrix(self, matrix: QRMatrix, version: int) -> QRMatrix:
-        clone = QRMatrix(version)
+        clone = type(matrix)(version)
         clone.matrix = [row[:] for row in matrix.matrix]
         clone.reserved = [row[:] for row in matrix.reserved]
         return clone
+
+
+def _generate_structured_part(job: tuple) -> QRMatrix:
+    """Process-pool entry point for one Structured Append symbol"""
+    (engines, verbose), *args = job
+    return QRCodeGenerator(engines, verbose)._generate_structured_part(*args)
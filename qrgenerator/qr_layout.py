@@ -0,0 +1,121 @@
+"""
+Precompiled symbol layout plans (block split + interleave + data placement)
+"""
+
+from typing import Dict, List, Tuple
+
+from .qr_matrix import QRMatrix
+from .qr_metrics import METRICS
+from .qr_structure import DATA_CAPACITY
+from .reed_solomon import EC_CODEWORDS_TABLE
+
+BITS_PER_BYTE = 8
+
+# Plans by (version, ec_level), built on first use and shared per process
+_PLAN_CACHE: Dict[Tuple[int, str], 'LayoutPlan'] = {}
+
+
+def block_sizes(version: int, ec_level: str) -> Tuple[List[int], int]:
+    """Data codewords per block (group 1 then group 2) and EC codewords per block"""
+    ec_info = EC_CODEWORDS_TABLE.get((version, ec_level))
+    if not ec_info:
+        raise ValueError(f"Invalid version {version} or EC level {ec_level}")
+    ec_per_block, blocks_g1, blocks_g2, _ = ec_info
+    data_total = DATA_CAPACITY[(version, ec_level)]
+    group1_size = (data_total - blocks_g2) // (blocks_g1 + blocks_g2)
+    return [group1_size] * blocks_g1 + [group1_size + 1] * blocks_g2, ec_per_block
+
+
+class LayoutPlan:
+    """Maps every (block, codeword, bit) of a symbol straight to its module.
+
+    Group 2 blocks hold one data codeword more than group 1 blocks; every block
+    carries ``ec_per_block`` EC codewords. Codewords are laid out in interleaved
+    order along the zig-zag placement path, so filling a symbol is a single
+    scatter of codeword bits with no interleaved list.
+    """
+
+    def __init__(self, version: int, ec_level: str):
+        self.version = version
+        self.ec_level = ec_level
+        self.data_block_sizes, self.ec_per_block = block_sizes(version, ec_level)
+        total_blocks = len(self.data_block_sizes)
+        ec_per_block = self.ec_per_block
+
+        template = QRMatrix(version)
+        template.build_function_patterns()
+        path = self._placement_path(template)
+
+        # Interleaved codeword order: data column by column, then EC likewise
+        order = []
+        for i in range(max(self.data_block_sizes)):
+            for block, size in enumerate(self.data_block_sizes):
+                if i < size:
+                    order.append((False, block, i))
+        for i in range(ec_per_block):
+            for block in range(total_blocks):
+                order.append((True, block, i))
+
+        self.data_positions: List[List[List[Tuple[int, int]]]] = [
+            [None] * size for size in self.data_block_sizes
+        ]
+        self.ec_positions: List[List[List[Tuple[int, int]]]] = [
+            [None] * ec_per_block for _ in range(total_blocks)
+        ]
+        for index, (is_ec, block, i) in enumerate(order):
+            cells = path[index * BITS_PER_BYTE:(index + 1) * BITS_PER_BYTE]
+            target = self.ec_positions if is_ec else self.data_positions
+            target[block][i] = cells
+        self.remainder_positions = path[len(order) * BITS_PER_BYTE:]
+
+    @staticmethod
+    def _placement_path(matrix: QRMatrix) -> List[Tuple[int, int]]:
+        """Unreserved modules in the order QRMatrix.place_data visits them"""
+        path = []
+        size = matrix.size
+        col = size - 1
+        direction = -1
+        while col > 0:
+            if col == 6:
+                col -= 1
+            rows = range(size - 1, -1, -1) if direction == -1 else range(size)
+            for row in rows:
+                for c in (col, col - 1):
+                    if not matrix.reserved[row][c]:
+                        path.append((row, c))
+            col -= 2
+            direction *= -1
+        return path
+
+    def split_blocks(self, data_codewords: List[int]) -> List[List[int]]:
+        blocks = []
+        start = 0
+        for size in self.data_block_sizes:
+            blocks.append(data_codewords[start:start + size])
+            start += size
+        return blocks
+
+    def fill(self, matrix: QRMatrix, data_blocks: List[List[int]],
+             ec_blocks: List[List[int]]) -> None:
+        """Scatter codeword bits of every block into matrix.matrix"""
+        rows = matrix.matrix
+        for blocks, positions in ((data_blocks, self.data_positions),
+                                  (ec_blocks, self.ec_positions)):
+            for block, block_positions in zip(blocks, positions):
+                for value, cells in zip(block, block_positions):
+                    shift = BITS_PER_BYTE - 1
+                    for r, c in cells:
+                        rows[r][c] = (value >> shift) & 1
+                        shift -= 1
+        for r, c in self.remainder_positions:
+            rows[r][c] = 0
+        matrix.invalidate_runs()
+
+
+def get_layout_plan(version: int, ec_level: str) -> LayoutPlan:
+    plan = _PLAN_CACHE.get((version, ec_level))
+    METRICS.cache_lookup('layout_plan', plan is not None)
+    if plan is None:
+        plan = LayoutPlan(version, ec_level)
+        _PLAN_CACHE[(version, ec_level)] = plan
+    return plan
@@ -0,0 +1,209 @@
+"""
+Branch-and-bound mask selection with early termination
+
+Masks are scored row band by row band. After each band a lower bound of the
+final penalty is known: every rule only grows as rows are added, and the
+dark-module term of rule 4 is bounded by the modules still to come. A mask is
+abandoned as soon as its bound cannot beat the best complete score so far.
+Masks that historically win for a version are tried first. The chosen mask
+and penalty match exhaustive QRMatrix.evaluate_penalty selection exactly,
+including the lowest-index tie break.
+"""
+
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .qr_matrix import NUM_MASK_PATTERNS, RULE_3_PATTERNS, QRMatrix
+from .qr_metrics import METRICS
+
+RULE_3_STRINGS = tuple(''.join(map(str, pattern)) for pattern in RULE_3_PATTERNS)
+RULE_3_BITS = tuple(int(pattern, 2) for pattern in RULE_3_STRINGS)
+RULE_3_WINDOW = 11
+RULE_3_FULL = (1 << RULE_3_WINDOW) - 1
+MODULE_CHARS = {1: '1', 0: '0', -1: 'x'}
+
+# Per-version mask bitmaps (reserved modules zeroed) and per-(version, EC)
+# format information writes, shared per process and with the NumPy engine
+_BITMAP_CACHE: Dict[int, List[List[List[int]]]] = {}
+_FORMAT_CACHE: Dict[Tuple[int, str], List[Dict[Tuple[int, int], int]]] = {}
+
+
+def mask_bitmaps(version: int) -> List[List[List[int]]]:
+    bitmaps = _BITMAP_CACHE.get(version)
+    METRICS.cache_lookup('mask_bitmaps', bitmaps is not None)
+    if bitmaps is None:
+        template = QRMatrix(version)
+        template.build_function_patterns()
+        size = template.size
+        bitmaps = [
+            [
+                [
+                    0 if template.reserved[i][j] else int(template._mask_condition(i, j, mask))
+                    for j in range(size)
+                ]
+                for i in range(size)
+            ]
+            for mask in range(NUM_MASK_PATTERNS)
+        ]
+        _BITMAP_CACHE[version] = bitmaps
+    return bitmaps
+
+
+def format_cells(version: int, ec_level: str) -> List[Dict[Tuple[int, int], int]]:
+    """Per mask: (row, col) -> value written by QRMatrix.add_format_information.
+
+    Later writes to the same module win, as in add_format_information; every
+    mask writes the same modules in the same order.
+    """
+    cells = _FORMAT_CACHE.get((version, ec_level))
+    if cells is None:
+        template = QRMatrix(version)
+        cells = []
+        for mask in range(NUM_MASK_PATTERNS):
+            writes = {}
+            for row, col, value in template.format_information_cells(ec_level, mask):
+                writes[(row, col)] = value
+            cells.append(writes)
+        _FORMAT_CACHE[(version, ec_level)] = cells
+    return cells
+
+
+class BranchAndBoundMaskSelector:
+    """Stateful selector: remembers which masks win for each version"""
+
+    BAND_ROWS = 8
+
+    def __init__(self, band_rows: int = BAND_ROWS):
+        self.band_rows = band_rows
+        self._wins: Dict[int, List[int]] = {}
+        self._format_cache: Dict[Tuple[int, str], List[Dict[int, List[tuple]]]] = {}
+
+    def mask_order(self, version: int) -> List[int]:
+        wins = self._wins.get(version, [0] * NUM_MASK_PATTERNS)
+        return sorted(range(NUM_MASK_PATTERNS), key=lambda mask: (-wins[mask], mask))
+
+    def select(self, matrix: QRMatrix, ec_level: str) -> Tuple[int, int, List[List[int]]]:
+        """Return (best mask, its penalty, masked rows with format information)"""
+        version = matrix.version
+        bitmaps = mask_bitmaps(version)
+        formats = self._format_rows(version, ec_level)
+        best: Optional[Tuple[int, int, List[List[int]]]] = None
+        for mask in self.mask_order(version):
+            if best is None:
+                limit = None
+            else:
+                # Ties go to the lower mask index, as in exhaustive selection
+                limit = best[1] if mask < best[0] else best[1] - 1
+            rows = self._masked_rows(matrix.matrix, bitmaps[mask], formats[mask])
+            result = self._evaluate(rows, matrix.size, limit)
+            if result is not None:
+                best = (mask, result[0], result[1])
+        wins = self._wins.setdefault(version, [0] * NUM_MASK_PATTERNS)
+        wins[best[0]] += 1
+        return best
+
+    def _format_rows(self, version: int, ec_level: str) -> List[Dict[int, List[tuple]]]:
+        """Per mask: row -> [(col, value)] format information writes"""
+        key = (version, ec_level)
+        formats = self._format_cache.get(key)
+        if formats is None:
+            formats = []
+            for cells in format_cells(version, ec_level):
+                by_row: Dict[int, List[tuple]] = {}
+                for (row, col), value in cells.items():
+                    by_row.setdefault(row, []).append((col, value))
+                formats.append(by_row)
+            self._format_cache[key] = formats
+        return formats
+
+    @staticmethod
+    def _masked_rows(base: List[List[int]], bitmap: List[List[int]],
+                     format_rows: Dict[int, List[tuple]]) -> Iterator[List[int]]:
+        for r, (row, mask_row) in enumerate(zip(base, bitmap)):
+            out = [a ^ b for a, b in zip(row, mask_row)]
+            for col, value in format_rows.get(r, ()):
+                out[col] = value
+            yield out
+
+    def _evaluate(self, rows: Iterator[List[int]], size: int,
+                  limit: Optional[int]) -> Optional[Tuple[int, List[List[int]]]]:
+        """Full penalty and rows, or None once the lower bound exceeds limit"""
+        total = size * size
+        penalty = 0  # rules 1 (rows, finished column runs), 2 and 3
+        dark = 0
+        col_prev = [None] * size
+        col_count = [0] * size
+        col_bits = [0] * size
+        col_valid = [0] * size
+        done: List[List[int]] = []
+        prev_row: Optional[List[int]] = None
+        for r, row in enumerate(rows):
+            penalty += self._row_penalty(row)
+            dark += row.count(1)
+            if prev_row is not None:
+                penalty += self._block_penalty(prev_row, row, size)
+            for c, value in enumerate(row):
+                if value == col_prev[c]:
+                    col_count[c] += 1
+                else:
+                    if col_count[c] >= 5:
+                        penalty += col_count[c] - 2
+                    col_prev[c] = value
+                    col_count[c] = 1
+                col_bits[c] = ((col_bits[c] << 1) | (value == 1)) & RULE_3_FULL
+                col_valid[c] = ((col_valid[c] << 1) | (value != -1)) & RULE_3_FULL
+                if (r >= RULE_3_WINDOW - 1 and col_valid[c] == RULE_3_FULL
+                        and col_bits[c] in RULE_3_BITS):
+                    penalty += 40
+            done.append(row)
+            prev_row = row
+            if limit is not None and (r + 1) % self.band_rows == 0 and r + 1 < size:
+                open_runs = sum(count - 2 for count in col_count if count >= 5)
+                remaining = total - (r + 1) * size
+                bound = penalty + open_runs + self._rule_4_bound(dark, remaining, total)
+                if bound > limit:
+                    return None
+        penalty += sum(count - 2 for count in col_count if count >= 5)
+        penalty += self._rule_4(dark, total)
+        if limit is not None and penalty > limit:
+            return None
+        return penalty, done
+
+    @staticmethod
+    def _row_penalty(row: List[int]) -> int:
+        penalty = 0
+        for _, run in groupby(row):
+            length = sum(1 for _ in run)
+            if length >= 5:
+                penalty += length - 2
+        text = ''.join(MODULE_CHARS[value] for value in row)
+        for pattern in RULE_3_STRINGS:
+            start = text.find(pattern)
+            while start != -1:
+                penalty += 40
+                start = text.find(pattern, start + 1)
+        return penalty
+
+    @staticmethod
+    def _block_penalty(upper: List[int], lower: List[int], size: int) -> int:
+        penalty = 0
+        for c in range(size - 1):
+            value = upper[c]
+            if upper[c + 1] == value and lower[c] == value and lower[c + 1] == value:
+                penalty += 3
+        return penalty
+
+    @staticmethod
+    def _rule_4(dark: int, total: int) -> int:
+        percent = (dark * 100) // total
+        return (abs(percent - 50) // 5) * 10
+
+    @staticmethod
+    def _rule_4_bound(dark: int, remaining: int, total: int) -> int:
+        low = (dark * 100) // total
+        high = ((dark + remaining) * 100) // total
+        if high < 50:
+            return (abs(high - 50) // 5) * 10
+        if low > 50:
+            return (abs(low - 50) // 5) * 10
+        return 0
@@ -2,8 +2,51 @@
 QR Code Matrix Generation and Data Placement
 """
 
+import re
+import struct
+from array import array
+from typing import Tuple
+
 from .qr_structure import get_version_size, get_alignment_positions
 
+NUM_MASK_PATTERNS = 8
+EC_LEVELS = ('L', 'M', 'Q', 'H')
+# 1:1:3:1:1 finder-like runs with four light modules on either side (penalty rule 3)
+RULE_3_PATTERNS = (
+    (1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0),
+    (0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1),
+)
+
+_DARK_RUN = re.compile(b'\x01+')
+# Signed module bytes (UNSET is 0xFF) -> 1 for dark, 0 otherwise
+_DARK_BYTES = bytes([0, 1]) + bytes(254)
+
+
+def dark_runs(rows) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """Dark modules of each row as (start column, length) runs"""
+    return tuple(
+        tuple(
+            (match.start(), match.end() - match.start())
+            for match in _DARK_RUN.finditer(array('b', row).tobytes().translate(_DARK_BYTES))
+        )
+        for row in rows
+    )
+
+
+def dark_rectangles(runs) -> Tuple[Tuple[int, int, int, int], ...]:
+    """Dark runs merged with identical runs in the rows below, as (x, y, width, height)"""
+    rectangles = []
+    above = {}  # run -> top row of the rectangle it extends
+    for y, row_runs in enumerate(tuple(runs) + ((),)):
+        current = {}
+        for run in row_runs:
+            current[run] = above.pop(run, y)
+        for (start, length), top in above.items():
+            rectangles.append((start, top, length, y - top))
+        above = current
+    rectangles.sort(key=lambda rect: (rect[1], rect[0]))
+    return tuple(rectangles)
+
 
 class QRMatrix:
     UNSET = -1
@@ -13,12 +56,141 @@ class QRMatrix:
     ALIGNMENT_SIZE = 5
     TIMING_ROW_COL = 6
     FORMAT_STRIP_ROW = 8
+    QUIET_ZONE = 4
+    NUM_MASK_PATTERNS = NUM_MASK_PATTERNS
+    VERSIONS = range(1, 41)
+
+    # Binary format: magic, revision, version, EC level index, mask (0xFF = unset),
+    # followed by the modules bit-packed row-major, MSB first.
+    BINARY_MAGIC = b'QR'
+    BINARY_REVISION = 1
+    BINARY_HEADER = struct.Struct('>2sBBBB')
+    BINARY_UNSET = 0xFF
+    EC_LEVEL_ORDER = EC_LEVELS
+
+    # Caches filled on first use by dark_runs() / dark_rectangles() / to_buffer()
+    _dark_runs = None
+    _dark_rectangles = None
+    _buffer = None
 
     def __init__(self, version):
         self.version = version
         self.size = get_version_size(version)
         self.matrix = [[self.UNSET] * self.size for _ in range(self.size)]
         self.reserved = [[False] * self.size for _ in range(self.size)]
+        self.ec_level = None
+        self.mask_pattern = None
+
+    @classmethod
+    def packed_size(cls, version):
+        size = get_version_size(version)
+        return cls.BINARY_HEADER.size + (size * size + 7) // 8
+
+    def to_bytes(self):
+        """Compact bit-packed serialization (header + one bit per module).
+
+        Unset modules are stored as light, which is how the renderers draw them.
+        """
+        header = self.BINARY_HEADER.pack(
+            self.BINARY_MAGIC, self.BINARY_REVISION, self._version_byte(),
+            self._ec_level_index(), self._mask_byte()
+        )
+        bit_string = ''.join(
+            '1' if module == self.BLACK else '0'
+            for row in self.matrix for module in row
+        )
+        total_bits = self.size * self.size
+        padding = -total_bits % 8
+        packed = int(bit_string, 2) << padding
+        return header + packed.to_bytes((total_bits + padding) // 8, 'big')
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuild a QRMatrix from the output of to_bytes()"""
+        view = memoryview(data)
+        if len(view) < cls.BINARY_HEADER.size:
+            raise ValueError("Truncated QRMatrix data")
+        magic, revision, version, ec_index, mask = cls.BINARY_HEADER.unpack_from(view)
+        if magic != cls.BINARY_MAGIC or revision != cls.BINARY_REVISION:
+            raise ValueError("Not a QRMatrix binary record")
+        from .qr_micro import MICRO_VERSION_FLAG, MicroQRMatrix
+        if version & MICRO_VERSION_FLAG:
+            cls, version = MicroQRMatrix, version & ~MICRO_VERSION_FLAG
+        if version not in cls.VERSIONS:
+            raise ValueError(f"Invalid version {version} in QRMatrix record")
+        if ec_index != cls.BINARY_UNSET and ec_index >= len(cls.EC_LEVEL_ORDER):
+            raise ValueError(f"Invalid EC level index {ec_index} in QRMatrix record")
+        if mask != cls.BINARY_UNSET and mask >= cls.NUM_MASK_PATTERNS:
+            raise ValueError(f"Invalid mask pattern {mask} in QRMatrix record")
+        qr = cls(version)
+        if len(view) < cls.packed_size(version):
+            raise ValueError("Truncated QRMatrix data")
+        qr.build_function_patterns()
+        total_bits = qr.size * qr.size
+        payload = view[cls.BINARY_HEADER.size:cls.packed_size(version)]
+        value = int.from_bytes(payload, 'big') >> (-total_bits % 8)
+        bit_string = format(value, f'0{total_bits}b')
+        size = qr.size
+        qr.matrix = [
+            [int(bit) for bit in bit_string[row * size:(row + 1) * size]]
+            for row in range(size)
+        ]
+        qr.invalidate_runs()
+        qr.ec_level = cls.EC_LEVEL_ORDER[ec_index] if ec_index != cls.BINARY_UNSET else None
+        qr.mask_pattern = mask if mask != cls.BINARY_UNSET else None
+        return qr
+
+    def _version_byte(self):
+        return self.version
+
+    def _ec_level_index(self):
+        if self.ec_level is None:
+            return self.BINARY_UNSET
+        return self.EC_LEVEL_ORDER.index(self.ec_level)
+
+    def _mask_byte(self):
+        return self.BINARY_UNSET if self.mask_pattern is None else self.mask_pattern
+
+    def to_buffer(self):
+        """One byte per module as a (size, size) uint8 memoryview.
+
+        The buffer is read-only and cached until the modules change, like
+        dark_runs(); consumers such as ``numpy.asarray(qr.to_buffer())`` wrap
+        it without further copies.
+        """
+        if self._buffer is None:
+            size = self.size
+            flat = bytearray(size * size)
+            for r, row in enumerate(self.matrix):
+                flat[r * size:(r + 1) * size] = bytes(module == self.BLACK for module in row)
+            self._buffer = memoryview(bytes(flat)).cast('B', (size, size))
+        return self._buffer
+
+    def __buffer__(self, flags):
+        # PEP 688 (Python 3.12+): lets memoryview(qr) / numpy.asarray(qr) work directly
+        return self.to_buffer()
+
+    def dark_runs(self) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+        """Dark modules of each row as (start column, length) runs.
+
+        Computed once and shared by all renderers. Every library path that
+        writes modules drops the cache; code writing to ``matrix`` directly
+        must call invalidate_runs().
+        """
+        if self._dark_runs is None:
+            self._dark_runs = dark_runs(self.matrix)
+        return self._dark_runs
+
+    def dark_rectangles(self) -> Tuple[Tuple[int, int, int, int], ...]:
+        """Dark runs merged with identical runs in the rows below, as (x, y, width, height)"""
+        if self._dark_rectangles is None:
+            self._dark_rectangles = dark_rectangles(self.dark_runs())
+        return self._dark_rectangles
+
+    def invalidate_runs(self):
+        self._dark_runs = None
+        self._dark_rectangles = None
+        self._buffer = None
 
     def add_finder_pattern(self, row, col):
         pattern = [
@@ -87,6 +259,7 @@ class QRMatrix:
             self.reserved[self.size - 1 - i][8] = True
 
     def build_function_patterns(self):
+        self.invalidate_runs()
         self.add_finder_pattern(0, 0)
         self.add_finder_pattern(0, self.size - 7)
         self.add_finder_pattern(self.size - 7, 0)
@@ -105,6 +278,7 @@ class QRMatrix:
         self.reserve_format_areas()
 
     def place_data(self, data_bits):
+        self.invalidate_runs()
         bit_index = 0
         col = self.size - 1
         direction = -1
@@ -129,6 +303,7 @@ class QRMatrix:
         return bit_index
 
     def apply_mask(self, mask_pattern):
+        self.invalidate_runs()
         for row in range(self.size):
             for col in range(self.size):
                 if not self.reserved[row][col]:
@@ -149,25 +324,33 @@ class QRMatrix:
         return masks[pattern](i, j) if 0 <= pattern < len(masks) else False
 
     def add_format_information(self, ec_level, mask_pattern):
+        self.invalidate_runs()
+        for row, col, value in self.format_information_cells(ec_level, mask_pattern):
+            self.matrix[row][col] = value
+
+    def format_information_cells(self, ec_level, mask_pattern):
+        """(row, col, value) writes of add_format_information, in write order"""
         format_bits = self._generate_format_bits(ec_level, mask_pattern)
+        cells = []
         for i in range(6):
-            self.matrix[8][i] = format_bits[i]
-        self.matrix[8][7] = format_bits[6]
-        self.matrix[8][8] = format_bits[7]
-        self.matrix[7][8] = format_bits[8]
-        self.matrix[5][8] = format_bits[9]
-        self.matrix[4][8] = format_bits[10]
-        self.matrix[3][8] = format_bits[11]
-        self.matrix[2][8] = format_bits[12]
-        self.matrix[1][8] = format_bits[13]
-        self.matrix[0][8] = format_bits[14]
+            cells.append((8, i, format_bits[i]))
+        cells.append((8, 7, format_bits[6]))
+        cells.append((8, 8, format_bits[7]))
+        cells.append((7, 8, format_bits[8]))
+        cells.append((5, 8, format_bits[9]))
+        cells.append((4, 8, format_bits[10]))
+        cells.append((3, 8, format_bits[11]))
+        cells.append((2, 8, format_bits[12]))
+        cells.append((1, 8, format_bits[13]))
+        cells.append((0, 8, format_bits[14]))
         for i in range(7):
-            self.matrix[8][self.size - 1 - i] = format_bits[i]
+            cells.append((8, self.size - 1 - i, format_bits[i]))
         for i in range(8):
             row = self.size - 1 - i
-            self.matrix[row][8] = format_bits[7 + i]
+            cells.append((row, 8, format_bits[7 + i]))
         dark_module_row = 4 * self.version + 9
-        self.matrix[dark_module_row][8] = 1
+        cells.append((dark_module_row, 8, 1))
+        return cells
 
     def _generate_format_bits(self, ec_level, mask_pattern):
         ec_bits = {'L': 0b01, 'M': 0b00, 'Q': 0b11, 'H': 0b10}
@@ -235,10 +418,7 @@ class QRMatrix:
 
     def _penalty_rule_3(self):
         penalty = 0
-        patterns = [
-            [1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0],
-            [0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1]
-        ]
+        patterns = RULE_3_PATTERNS
         for row in range(self.size):
             for col in range(self.size - 10):
                 for pattern in patterns:
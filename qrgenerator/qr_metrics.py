@@ -0,0 +1,265 @@
+"""
+Process-wide metrics registry with Prometheus text exposition
+
+Counters and histograms for long-lived workers: symbols generated per version
+and EC level, per-stage latency (encode, rs, placement, mask, render), cache
+hits/misses and payload sizes. Each thread records into its own shard, so
+the hot path takes no lock; snapshot() and prometheus_text() merge the shards.
+When a thread exits, its shard is folded into a shared one, so worker threads
+that come and go do not grow the registry.
+
+The registry is disabled by default and every hook is a single attribute
+check while disabled. Enable it with enable() or QRGENERATOR_METRICS=1.
+"""
+
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+from typing import Dict, List, Optional, Sequence, Tuple
+
+METRICS_ENV_VAR = 'QRGENERATOR_METRICS'
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+PAYLOAD_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+Labels = Tuple[str, ...]
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._definitions: Dict[str, tuple] = {}
+        self._shards: List[Dict[str, dict]] = []
+        self._base: Dict[str, dict] = {}  # counts of threads that have exited
+        self._retired: deque = deque()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._null_timer = nullcontext()
+
+    def define(self, name: str, kind: str, help_text: str, label_names: Sequence[str] = (),
+               buckets: Optional[Sequence[float]] = None) -> None:
+        if kind not in (COUNTER, HISTOGRAM):
+            raise ValueError(f"Unknown metric type {kind!r}")
+        if kind == HISTOGRAM and not buckets:
+            raise ValueError(f"Histogram {name} needs buckets")
+        self._definitions[name] = (kind, help_text, tuple(label_names), tuple(buckets or ()))
+
+    def _shard(self) -> Dict[str, dict]:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._collect_retired()
+                self._shards.append(shard)
+            self._local.shard = shard
+            # The token lives in the thread-local storage only, so it dies with
+            # the thread; appending to a deque is safe from any thread.
+            self._local.token = token = _ThreadToken()
+            weakref.finalize(token, self._retired.append, shard).atexit = False
+        return shard
+
+    def _collect_retired(self) -> None:
+        """Fold the shards of exited threads into the base shard (lock held)"""
+        while self._retired:
+            shard = self._retired.popleft()
+            for index, candidate in enumerate(self._shards):
+                if candidate is shard:
+                    del self._shards[index]
+                    break
+            self._merge_into(self._base, shard)
+
+    def _merge_into(self, target: Dict[str, dict], shard: Dict[str, dict]) -> None:
+        for name, series in list(shard.items()):
+            kind = self._definitions[name][0]
+            merged = target.setdefault(name, {})
+            for labels, value in list(series.items()):
+                if kind == COUNTER:
+                    merged[labels] = merged.get(labels, 0) + value
+                else:
+                    total = merged.get(labels)
+                    merged[labels] = list(value) if total is None else [
+                        a + b for a, b in zip(total, value)
+                    ]
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        series = self._shard().setdefault(name, {})
+        series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        if not self.enabled:
+            return
+        series = self._shard().setdefault(name, {})
+        state = series.get(labels)
+        if state is None:
+            # Per-bucket (non-cumulative) counts, +Inf last, then sum
+            state = series[labels] = [0] * (len(self._definitions[name][3]) + 1) + [0.0]
+        state[bisect_left(self._definitions[name][3], value)] += 1
+        state[-1] += value
+
+    def time(self, stage: str):
+        """Context manager observing qr_stage_duration_seconds{stage}"""
+        if not self.enabled:
+            return self._null_timer
+        return _StageTimer(self, stage)
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        if self.enabled:
+            self.inc('qr_cache_requests_total', (cache, 'hit' if hit else 'miss'))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._collect_retired()
+            self._base.clear()
+            for shard in self._shards:
+                shard.clear()
+
+    def _merged(self) -> Dict[str, Dict[Labels, object]]:
+        merged: Dict[str, Dict[Labels, object]] = {}
+        with self._lock:
+            self._collect_retired()
+            self._merge_into(merged, self._base)
+            shards = list(self._shards)
+        for shard in shards:
+            self._merge_into(merged, shard)
+        return merged
+
+    def snapshot(self) -> Dict[str, dict]:
+        """All metrics as plain data: {name: {type, help, samples: [...]}}.
+
+        Histogram samples carry cumulative ``buckets`` keyed by upper bound
+        ('+Inf' last), plus ``sum`` and ``count``.
+        """
+        merged = self._merged()
+        result = {}
+        for name, (kind, help_text, label_names, buckets) in self._definitions.items():
+            samples = []
+            for labels, value in sorted(merged.get(name, {}).items()):
+                sample = {'labels': dict(zip(label_names, labels))}
+                if kind == COUNTER:
+                    sample['value'] = value
+                else:
+                    cumulative = {}
+                    running = 0
+                    for bound, count in zip(buckets + ('+Inf',), value[:-1]):
+                        running += count
+                        cumulative[_format_bound(bound)] = running
+                    sample.update(buckets=cumulative, sum=value[-1], count=running)
+                samples.append(sample)
+            result[name] = {'type': kind, 'help': help_text, 'samples': samples}
+        return result
+
+    def prometheus_text(self) -> str:
+        """Snapshot in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, metric in self.snapshot().items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for sample in metric['samples']:
+                labels = sample['labels']
+                if metric['type'] == COUNTER:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(sample['value'])}")
+                    continue
+                for bound, count in sample['buckets'].items():
+                    lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically write prometheus_text() (e.g. for a node_exporter textfile collector)"""
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(temp, path)
+
+
+class _ThreadToken:
+    __slots__ = ('__weakref__',)
+
+
+class _StageTimer:
+    __slots__ = ('registry', 'stage', 'start')
+
+    def __init__(self, registry: MetricsRegistry, stage: str):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(
+            'qr_stage_duration_seconds', time.perf_counter() - self.start, (self.stage,)
+        )
+
+
+def _format_bound(bound) -> str:
+    return bound if isinstance(bound, str) else repr(float(bound))
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(str(value))}"' for key, value in items) + '}'
+
+
+METRICS = MetricsRegistry(enabled=os.environ.get(METRICS_ENV_VAR, '') not in ('', '0'))
+METRICS.define('qr_codes_generated_total', COUNTER,
+               "Symbols generated, by version and EC level", ('version', 'ec_level'))
+METRICS.define('qr_stage_duration_seconds', HISTOGRAM,
+               "Time spent per generation stage", ('stage',), LATENCY_BUCKETS)
+METRICS.define('qr_cache_requests_total', COUNTER,
+               "Lookups in per-process caches", ('cache', 'result'))
+METRICS.define('qr_payload_bytes', HISTOGRAM,
+               "Payload size in bytes per encoded symbol (UTF-8 for text)", (), PAYLOAD_BUCKETS)
+
+
+def enable() -> None:
+    METRICS.enabled = True
+
+
+def disable() -> None:
+    METRICS.enabled = False
+
+
+def snapshot() -> Dict[str, dict]:
+    return METRICS.snapshot()
+
+
+def prometheus_text() -> str:
+    return METRICS.prometheus_text()
+
+
+def timed(stage: str):
+    """Decorator form of METRICS.time(stage); a plain call while disabled"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return func(*args, **kwargs)
+            with _StageTimer(METRICS, stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
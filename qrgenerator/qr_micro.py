@@ -0,0 +1,197 @@
+"""
+Micro QR Code (M1-M4) tables, encoder and matrix
+
+Micro QR symbols are 11x11 to 17x17 modules with a single finder pattern,
+timing patterns along row 0 and column 0, one Reed-Solomon block, four mask
+patterns and their own mask evaluation (highest score wins). Version numbers
+1-4 stand for M1-M4. M1 carries error detection only; its EC level is None.
+"""
+
+from typing import List, Optional
+
+from .qr_encoder import (
+    QREncoder, MODE_NUMERIC, MODE_ALPHANUMERIC, MODE_BYTE, PADDING_BYTE_1, PADDING_BYTE_2,
+)
+from .qr_matrix import QRMatrix
+
+MICRO_VERSIONS = (1, 2, 3, 4)
+MICRO_VERSION_FLAG = 0x80  # set in the serialized version byte of Micro QR records
+MICRO_QUIET_ZONE = 2
+
+# Data capacity in bits; M1 and M3 end with a 4-bit data codeword
+MICRO_DATA_BITS = {
+    (1, None): 20,
+    (2, 'L'): 40, (2, 'M'): 32,
+    (3, 'L'): 84, (3, 'M'): 68,
+    (4, 'L'): 128, (4, 'M'): 112, (4, 'Q'): 80,
+}
+MICRO_EC_CODEWORDS = {
+    (1, None): 2,
+    (2, 'L'): 5, (2, 'M'): 6,
+    (3, 'L'): 6, (3, 'M'): 8,
+    (4, 'L'): 8, (4, 'M'): 10, (4, 'Q'): 14,
+}
+MICRO_EC_LEVELS = {1: (None,), 2: ('L', 'M'), 3: ('L', 'M'), 4: ('L', 'M', 'Q')}
+# Symbol number (version + EC level) carried in the format information
+MICRO_SYMBOL_NUMBERS = {key: number for number, key in enumerate(MICRO_DATA_BITS)}
+
+MICRO_MODE_INDICATORS = {MODE_NUMERIC: 0, MODE_ALPHANUMERIC: 1, MODE_BYTE: 2}
+# Character count bits per mode for M1-M4 (None: mode not available)
+MICRO_CHARACTER_COUNT_BITS = {
+    MODE_NUMERIC: (3, 4, 5, 6),
+    MODE_ALPHANUMERIC: (None, 3, 4, 5),
+    MODE_BYTE: (None, None, 4, 5),
+}
+# Micro mask patterns 0-3 are QR patterns 1, 4, 6 and 7
+MICRO_MASK_PATTERNS = (1, 4, 6, 7)
+MICRO_FORMAT_MASK = 0b100010001000101
+FORMAT_GENERATOR = 0b10100110111
+
+
+def micro_version_name(version: int) -> str:
+    return f"M{version}"
+
+
+def parse_micro_version(version) -> int:
+    """Accept 1-4 or 'M1'-'M4'"""
+    if isinstance(version, str) and version.upper().startswith('M'):
+        version = version[1:]
+    try:
+        number = int(version)
+    except (TypeError, ValueError):
+        number = None
+    if number not in MICRO_VERSIONS:
+        raise ValueError(f"Invalid Micro QR version {version!r} (supported: M1-M4)")
+    return number
+
+
+class MicroQREncoder(QREncoder):
+    """Segment headers and padding for Micro QR; data bits are the same as QR's"""
+
+    def supports(self, mode: int, version: int) -> bool:
+        bits = MICRO_CHARACTER_COUNT_BITS.get(mode)
+        return bits is not None and bits[version - 1] is not None
+
+    def get_character_count_bits(self, mode: int, version: int) -> int:
+        if not self.supports(mode, version):
+            raise ValueError(f"Mode {mode} is not available in {micro_version_name(version)}")
+        return MICRO_CHARACTER_COUNT_BITS[mode][version - 1]
+
+    def segment_header(self, mode: int, length: int, version: int) -> List[int]:
+        # M1 has no mode indicator; M2-M4 use 1-3 bits
+        bits = self._to_bits(MICRO_MODE_INDICATORS[mode], version - 1)
+        bits.extend(self._to_bits(length, self.get_character_count_bits(mode, version)))
+        return bits
+
+    def terminator_bits(self, version: int) -> int:
+        return 2 * version + 1
+
+    def add_micro_padding(self, bits: List[int], version: int, ec_level: Optional[str]) -> List[int]:
+        """Terminator, zero bits to the codeword boundary, then pad codewords.
+
+        In M1 and M3 the final data codeword is 4 bits and is padded with 0000.
+        """
+        capacity = MICRO_DATA_BITS[(version, ec_level)]
+        bits = bits + [0] * min(self.terminator_bits(version), capacity - len(bits))
+        bits.extend([0] * min(-len(bits) % 8, capacity - len(bits)))
+        full_codeword_bits = capacity - capacity % 8
+        padding_bytes = [PADDING_BYTE_1, PADDING_BYTE_2]
+        index = 0
+        while len(bits) < full_codeword_bits:
+            bits.extend(self._to_bits(padding_bytes[index % 2], 8))
+            index += 1
+        bits.extend([0] * (capacity - len(bits)))
+        return bits
+
+
+class MicroQRMatrix(QRMatrix):
+    NUM_MASK_PATTERNS = len(MICRO_MASK_PATTERNS)
+    QUIET_ZONE = MICRO_QUIET_ZONE
+    VERSIONS = MICRO_VERSIONS
+
+    def __init__(self, version):
+        self.version = version
+        self.size = 2 * version + 9
+        self.matrix = [[self.UNSET] * self.size for _ in range(self.size)]
+        self.reserved = [[False] * self.size for _ in range(self.size)]
+        self.ec_level = None
+        self.mask_pattern = None
+
+    @property
+    def name(self) -> str:
+        return micro_version_name(self.version)
+
+    @classmethod
+    def packed_size(cls, version):
+        size = 2 * version + 9
+        return cls.BINARY_HEADER.size + (size * size + 7) // 8
+
+    def _version_byte(self):
+        return MICRO_VERSION_FLAG | self.version
+
+    def build_function_patterns(self):
+        self.invalidate_runs()
+        self.add_finder_pattern(0, 0)
+        self.add_separator(7, 0, 8, 1)
+        self.add_separator(0, 7, 1, 8)
+        self.add_timing_patterns()
+        self.reserve_format_areas()
+
+    def add_timing_patterns(self):
+        for i in range(8, self.size):
+            value = self.BLACK if i % 2 == 0 else self.WHITE
+            self.matrix[0][i] = value
+            self.reserved[0][i] = True
+            self.matrix[i][0] = value
+            self.reserved[i][0] = True
+
+    def reserve_format_areas(self):
+        for i in range(1, 9):
+            self.reserved[8][i] = True
+            self.reserved[i][8] = True
+
+    def place_data(self, data_bits):
+        # Same zigzag as QR, but the timing column is column 0, so no column is skipped
+        self.invalidate_runs()
+        bit_index = 0
+        direction = -1
+        for col in range(self.size - 1, 0, -2):
+            rows = range(self.size - 1, -1, -1) if direction == -1 else range(self.size)
+            for row in rows:
+                for c in (col, col - 1):
+                    if not self.reserved[row][c]:
+                        if bit_index < len(data_bits):
+                            self.matrix[row][c] = data_bits[bit_index]
+                            bit_index += 1
+                        else:
+                            self.matrix[row][c] = 0
+            direction *= -1
+        return bit_index
+
+    def apply_mask(self, mask_pattern):
+        super().apply_mask(MICRO_MASK_PATTERNS[mask_pattern])
+
+    def format_information_cells(self, ec_level, mask_pattern):
+        format_bits = self._generate_format_bits(ec_level, mask_pattern)
+        cells = []
+        for i in range(8):
+            cells.append((8, i + 1, format_bits[i]))
+        for i in range(7):
+            cells.append((7 - i, 8, format_bits[8 + i]))
+        return cells
+
+    def _generate_format_bits(self, ec_level, mask_pattern):
+        format_data = (MICRO_SYMBOL_NUMBERS[(self.version, ec_level)] << 2) | mask_pattern
+        remainder = format_data << 10
+        for shift in range(14, 9, -1):
+            if remainder & (1 << shift):
+                remainder ^= FORMAT_GENERATOR << (shift - 10)
+        format_info = ((format_data << 10) | remainder) ^ MICRO_FORMAT_MASK
+        return [(format_info >> i) & 1 for i in range(14, -1, -1)]
+
+    def evaluate_score(self):
+        """Micro QR mask evaluation: dark modules on the right and bottom edges (higher is better)"""
+        edge = range(1, self.size)
+        right = sum(1 for row in edge if self.matrix[row][-1] == self.BLACK)
+        bottom = sum(1 for col in edge if self.matrix[-1][col] == self.BLACK)
+        return min(right, bottom) * 16 + max(right, bottom)
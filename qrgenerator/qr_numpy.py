@@ -0,0 +1,140 @@
+"""
+Optional NumPy batch engine for masking and penalty scoring
+
+Stacks same-version symbols into an (N, size, size) array, applies all 8 mask
+bitmaps by broadcasting and scores penalty rules 1-4 with vectorized
+operations. Results agree exactly with QRMatrix.evaluate_penalty.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+from .qr_mask_select import format_cells, mask_bitmaps
+from .qr_matrix import RULE_3_PATTERNS, QRMatrix
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is missing
+    np = None
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class NumpyMaskEngine:
+    """Vectorized best-mask selection for batches of same-version symbols.
+
+    ``chunk_size`` bounds memory: each chunk holds chunk_size * 8 masked copies.
+    """
+
+    DEFAULT_CHUNK_SIZE = 64
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if np is None:
+            raise ImportError("NumpyMaskEngine requires NumPy (pip install numpy)")
+        self.chunk_size = chunk_size
+        self._mask_cache: Dict[int, 'np.ndarray'] = {}
+        self._format_cache: Dict[Tuple[int, str], tuple] = {}
+
+    def mask_bitmaps(self, version: int) -> 'np.ndarray':
+        """(8, size, size) int8 XOR bitmaps, zero on reserved modules"""
+        bitmaps = self._mask_cache.get(version)
+        if bitmaps is None:
+            bitmaps = np.array(mask_bitmaps(version), dtype=np.int8)
+            self._mask_cache[version] = bitmaps
+        return bitmaps
+
+    def _format_cells(self, version: int, ec_level: str) -> tuple:
+        """Module coordinates written by add_format_information and their values per mask"""
+        cells = self._format_cache.get((version, ec_level))
+        if cells is None:
+            per_mask = format_cells(version, ec_level)
+            coords = list(per_mask[0])
+            values = [[writes[coord] for coord in coords] for writes in per_mask]
+            rows = np.array([r for r, _ in coords])
+            cols = np.array([c for _, c in coords])
+            cells = (rows, cols, np.array(values, dtype=np.int8))
+            self._format_cache[(version, ec_level)] = cells
+        return cells
+
+    def masked_candidates(self, matrices: Sequence[QRMatrix],
+                          ec_levels: Sequence[str]) -> 'np.ndarray':
+        """(N, 8, size, size) array: every symbol under every mask, with format info"""
+        version = matrices[0].version
+        base = np.array([m.matrix for m in matrices], dtype=np.int8)
+        candidates = base[:, None, :, :] ^ self.mask_bitmaps(version)[None, :, :, :]
+        for level in set(ec_levels):
+            rows, cols, values = self._format_cells(version, level)
+            selected = np.array([ec == level for ec in ec_levels])
+            block = candidates[selected]
+            block[:, :, rows, cols] = values[None, :, :]
+            candidates[selected] = block
+        return candidates
+
+    def penalties(self, stack: 'np.ndarray') -> 'np.ndarray':
+        """Total penalty over the last two axes of an (..., size, size) stack"""
+        return (
+            self._penalty_rule_1(stack) + self._penalty_rule_2(stack)
+            + self._penalty_rule_3(stack) + self._penalty_rule_4(stack)
+        )
+
+    def select(self, matrices: Sequence[QRMatrix],
+               ec_levels: Sequence[str]) -> List[Tuple[int, int]]:
+        """Best (mask, penalty) per symbol; all matrices must share one version"""
+        if len({m.version for m in matrices}) > 1:
+            raise ValueError("NumpyMaskEngine.select expects symbols of a single version")
+        results = []
+        for start in range(0, len(matrices), self.chunk_size):
+            chunk = matrices[start:start + self.chunk_size]
+            scores = self.penalties(
+                self.masked_candidates(chunk, ec_levels[start:start + self.chunk_size])
+            )
+            best = scores.argmin(axis=1)
+            results.extend(
+                (int(mask), int(scores[n, mask])) for n, mask in enumerate(best)
+            )
+        return results
+
+    @staticmethod
+    def _run_penalty(lines: 'np.ndarray') -> 'np.ndarray':
+        # A run of length L >= 5 scores L - 2: one point per 5-module window
+        # inside it (L - 4) plus 2 per run, counted at its first window.
+        eq = lines[..., 1:] == lines[..., :-1]
+        windows = eq[..., :-3] & eq[..., 1:-2] & eq[..., 2:-1] & eq[..., 3:]
+        starts = windows.copy()
+        starts[..., 1:] &= ~windows[..., :-1]
+        return windows.sum(axis=(-2, -1)) + 2 * starts.sum(axis=(-2, -1))
+
+    def _penalty_rule_1(self, stack: 'np.ndarray') -> 'np.ndarray':
+        return self._run_penalty(stack) + self._run_penalty(np.swapaxes(stack, -1, -2))
+
+    def _penalty_rule_2(self, stack: 'np.ndarray') -> 'np.ndarray':
+        top_left = stack[..., :-1, :-1]
+        same = (
+            (stack[..., :-1, 1:] == top_left)
+            & (stack[..., 1:, :-1] == top_left)
+            & (stack[..., 1:, 1:] == top_left)
+        )
+        return 3 * same.sum(axis=(-2, -1))
+
+    @staticmethod
+    def _pattern_matches(lines: 'np.ndarray') -> 'np.ndarray':
+        width = lines.shape[-1] - 10
+        total = 0
+        for pattern in RULE_3_PATTERNS:
+            match = np.ones(lines.shape[:-1] + (width,), dtype=bool)
+            for offset, value in enumerate(pattern):
+                match &= lines[..., offset:offset + width] == value
+            total = total + match.sum(axis=(-2, -1))
+        return total
+
+    def _penalty_rule_3(self, stack: 'np.ndarray') -> 'np.ndarray':
+        rows = self._pattern_matches(stack)
+        cols = self._pattern_matches(np.swapaxes(stack, -1, -2))
+        return 40 * (rows + cols)
+
+    def _penalty_rule_4(self, stack: 'np.ndarray') -> 'np.ndarray':
+        total = stack.shape[-1] * stack.shape[-2]
+        dark = (stack == 1).sum(axis=(-2, -1))
+        percent = (dark * 100) // total
+        return (np.abs(percent - 50) // 5) * 10
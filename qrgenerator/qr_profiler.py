@@ -0,0 +1,128 @@
+"""
+Profiling hooks (cProfile / tracemalloc) for QR generation and rendering
+"""
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class QRProfiler:
+    """Context manager collecting cProfile data and per-stage peak allocations.
+
+    Per-stage peaks need tracemalloc.reset_peak() (Python 3.9+); on older
+    interpreters they are reported as unavailable (``peak_bytes`` is None).
+
+    Usage:
+        with QRProfiler() as profiler:
+            with profiler.stage('generate'):
+                qr = gen.generate(data)
+            with profiler.stage('render'):
+                svg = SVGRenderer().render(qr)
+        print(profiler.report())
+    """
+
+    DEFAULT_SORT = 'cumulative'
+    DEFAULT_LIMIT = 20
+
+    def __init__(self, cpu: bool = True, memory: bool = True,
+                 sort_by: str = DEFAULT_SORT, limit: int = DEFAULT_LIMIT):
+        self.cpu = cpu
+        self.memory = memory
+        self.sort_by = sort_by
+        self.limit = limit
+        self.profile = cProfile.Profile() if cpu else None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._stage_order: List[str] = []
+        self._started_tracemalloc = False
+
+    def __enter__(self) -> 'QRProfiler':
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.profile is not None:
+            self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.profile is not None:
+            self.profile.disable()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name: str):
+        tracing = self.memory and tracemalloc.is_tracing() and self._reset_peak()
+        if tracing:
+            baseline, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = None
+            if tracing:
+                _, peak_total = tracemalloc.get_traced_memory()
+                peak = max(0, peak_total - baseline)
+            self._record_stage(name, elapsed, peak)
+
+    @staticmethod
+    def _reset_peak() -> bool:
+        # tracemalloc.reset_peak() is only available on Python 3.9+; without it
+        # the traced peak spans all earlier stages and cannot be attributed
+        if not hasattr(tracemalloc, 'reset_peak'):
+            return False
+        tracemalloc.reset_peak()
+        return True
+
+    def _record_stage(self, name: str, elapsed: float, peak: Optional[int]) -> None:
+        if name not in self.stages:
+            self.stages[name] = {'calls': 0, 'seconds': 0.0, 'peak_bytes': None}
+            self._stage_order.append(name)
+        entry = self.stages[name]
+        entry['calls'] += 1
+        entry['seconds'] += elapsed
+        if peak is not None:
+            entry['peak_bytes'] = max(entry['peak_bytes'] or 0, peak)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        if self.profile is None:
+            return None
+        return pstats.Stats(self.profile)
+
+    def dump_stats(self, path: str) -> None:
+        if self.profile is None:
+            raise RuntimeError("CPU profiling is disabled for this profiler")
+        self.profile.dump_stats(path)
+
+    def report(self) -> str:
+        out = io.StringIO()
+        if self._stage_order:
+            out.write("Stages:\n")
+            for name in self._stage_order:
+                entry = self.stages[name]
+                out.write(
+                    f"  {name:<12} calls={entry['calls']:<4} "
+                    f"time={entry['seconds'] * 1000:.2f}ms "
+                    f"peak={self._format_bytes(entry['peak_bytes'])}\n"
+                )
+        if self.profile is not None:
+            out.write(f"\nTop {self.limit} functions by {self.sort_by} time:\n")
+            stats = pstats.Stats(self.profile, stream=out)
+            stats.strip_dirs().sort_stats(self.sort_by).print_stats(self.limit)
+        return out.getvalue()
+
+    @staticmethod
+    def _format_bytes(count: Optional[float]) -> str:
+        if count is None:
+            return "n/a"
+        for unit in ('B', 'KiB', 'MiB'):
+            if count < 1024:
+                return f"{count:.0f}{unit}" if unit == 'B' else f"{count:.1f}{unit}"
+            count /= 1024
+        return f"{count:.1f}GiB"
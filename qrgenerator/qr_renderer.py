@@ -1,27 +1,59 @@
 """
-QR Code Renderers (ASCII, SVG)
+QR Code Renderers (ASCII, SVG, ZPL, PBM, BMP)
+
+All renderers draw from QRMatrix.dark_runs() / dark_rectangles(), which each
+symbol computes once, so their cost follows the number of dark runs rather
+than the number of modules. Matrix-like objects without those methods (only
+``size`` and ``matrix``) are rendered from runs computed on the fly.
 """
 
+import io
+import struct
+from abc import ABC, abstractmethod
+
+from .qr_matrix import dark_rectangles, dark_runs
+from .qr_metrics import timed
+
+
+def _dark_runs(matrix):
+    if hasattr(matrix, 'dark_runs'):
+        return matrix.dark_runs()
+    return dark_runs(matrix.matrix)
+
+
+def _dark_rectangles(matrix):
+    if hasattr(matrix, 'dark_rectangles'):
+        return matrix.dark_rectangles()
+    return dark_rectangles(dark_runs(matrix.matrix))
+
+
+def _text_row(runs, size, dark, light):
+    """One symbol row as text, from its dark runs"""
+    parts = []
+    position = 0
+    for start, length in runs:
+        parts.append(light * (start - position))
+        parts.append(dark * length)
+        position = start + length
+    parts.append(light * (size - position))
+    return ''.join(parts)
+
 
 class ASCIIRenderer:
+    @timed('render')
     def render(self, matrix, border=2):
         lines = []
         width = matrix.size + 2 * border
         lines.extend(['█' * width * 2] * border)
-        for row in matrix.matrix:
-            line = '█' * (border * 2)
-            for module in row:
-                if module == 1:
-                    line += '██'
-                else:
-                    line += '  '
-            line += '█' * (border * 2)
-            lines.append(line)
+        edge = '█' * (border * 2)
+        for runs in _dark_runs(matrix):
+            lines.append(edge + _text_row(runs, matrix.size, '██', '  ') + edge)
         lines.extend(['█' * width * 2] * border)
         return '\n'.join(lines)
 
 
 class SVGRenderer:
+    @timed('render')
     def render(self, matrix, module_size=10, border=4):
         size = matrix.size + 2 * border
         svg_size = size * module_size
@@ -33,30 +65,184 @@ class SVGRenderer:
             f'  <rect width="{svg_size}" height="{svg_size}" fill="white"/>',
             f'  <g fill="black">',
         ]
-        for row in range(matrix.size):
-            for col in range(matrix.size):
-                if matrix.matrix[row][col] == 1:
-                    x = (col + border) * module_size
-                    y = (row + border) * module_size
-                    svg.append(
-                        f'    <rect x="{x}" y="{y}" '
-                        f'width="{module_size}" height="{module_size}"/>'
-                    )
+        for col, row, width, height in _dark_rectangles(matrix):
+            x = (col + border) * module_size
+            y = (row + border) * module_size
+            svg.append(
+                f'    <rect x="{x}" y="{y}" '
+                f'width="{width * module_size}" height="{height * module_size}"/>'
+            )
         svg.extend(['  </g>', '</svg>'])
         return '\n'.join(svg)
 
 
 class ImageRenderer:
+    @timed('render')
     def render(self, matrix, module_char='█', empty_char=' ', border=2):
         lines = []
         width = matrix.size + 2 * border
         border_line = module_char * width
         lines.extend([border_line] * border)
-        for row in matrix.matrix:
-            line = module_char * border
-            for module in row:
-                line += module_char if module == 1 else empty_char
-            line += module_char * border
-            lines.append(line)
+        edge = module_char * border
+        for runs in _dark_runs(matrix):
+            lines.append(edge + _text_row(runs, matrix.size, module_char, empty_char) + edge)
         lines.extend([border_line] * border)
         return '\n'.join(lines)
+
+
+class _PackedRasterRenderer(ABC):
+    """Base for 1-bit raster formats: module rows go straight to packed bytes.
+
+    ``render`` returns the whole output as bytes; ``write`` streams it to a
+    file-like (``write``) or socket-like (``sendall``) sink row by row.
+    Formats supply ``_header`` and may override ``_rows`` and ``_footer``;
+    extra keyword options of ``render``/``write`` are passed to both.
+    """
+
+    BOTTOM_UP = False
+
+    def render(self, matrix, module_size=4, border=4, **options):
+        buffer = io.BytesIO()
+        self.write(matrix, buffer, module_size=module_size, border=border, **options)
+        return buffer.getvalue()
+
+    @timed('render')
+    def write(self, matrix, sink, module_size=4, border=4, **options):
+        pixels, row_bytes = self._dimensions(matrix, module_size, border)
+        send = self._sink_writer(sink)
+        send(self._header(pixels, row_bytes, **options))
+        packed = self._packed_rows(matrix, module_size, border, bottom_up=self.BOTTOM_UP)
+        for chunk in self._rows(packed, row_bytes):
+            send(chunk)
+        send(self._footer(**options))
+
+    @abstractmethod
+    def _header(self, pixels, row_bytes, **options):
+        """Bytes before the first pixel row"""
+
+    def _rows(self, packed_rows, row_bytes):
+        return packed_rows
+
+    def _footer(self, **options):
+        return b''
+
+    @staticmethod
+    def _sink_writer(sink):
+        return sink.sendall if hasattr(sink, 'sendall') else sink.write
+
+    @staticmethod
+    def _dimensions(matrix, module_size, border):
+        if module_size < 1 or int(module_size) != module_size:
+            raise ValueError(f"module_size must be a positive integer, got {module_size}")
+        pixels = (matrix.size + 2 * border) * module_size
+        return pixels, (pixels + 7) // 8
+
+    def _packed_rows(self, matrix, module_size, border, bottom_up=False):
+        """Yield each pixel row, MSB first, 1 = dark, padded to whole bytes"""
+        pixels, row_bytes = self._dimensions(matrix, module_size, border)
+        # Bit offset of module column 0's right edge, counted from the row's LSB
+        origin = row_bytes * 8 - border * module_size
+        blank = bytes(row_bytes)
+        runs = _dark_runs(matrix)
+        for _ in range(border * module_size):
+            yield blank
+        for row_runs in (reversed(runs) if bottom_up else runs):
+            value = 0
+            for start, length in row_runs:
+                value |= ((1 << (length * module_size)) - 1) << (origin - (start + length) * module_size)
+            packed = value.to_bytes(row_bytes, 'big')
+            for _ in range(module_size):
+                yield packed
+        for _ in range(border * module_size):
+            yield blank
+
+
+class PBMRenderer(_PackedRasterRenderer):
+    """Binary PBM (P4) bitmap"""
+
+    def _header(self, pixels, row_bytes):
+        return f"P4\n{pixels} {pixels}\n".encode('ascii')
+
+
+class BMPRenderer(_PackedRasterRenderer):
+    """1-bit-per-pixel Windows BMP with a white/black palette"""
+
+    FILE_HEADER = struct.Struct('<2sIHHI')
+    INFO_HEADER = struct.Struct('<IiiHHIIiiII')
+    PALETTE = b'\xff\xff\xff\x00' + b'\x00\x00\x00\x00'  # index 0 white, 1 black
+    PIXELS_PER_METER = 11811  # 300 dpi
+    BOTTOM_UP = True  # BMP stores rows bottom-up, each padded to a 4-byte boundary
+
+    @staticmethod
+    def _stride(row_bytes):
+        return (row_bytes + 3) & ~3
+
+    def _header(self, pixels, row_bytes):
+        image_size = self._stride(row_bytes) * pixels
+        offset = self.FILE_HEADER.size + self.INFO_HEADER.size + len(self.PALETTE)
+        return b''.join((
+            self.FILE_HEADER.pack(b'BM', offset + image_size, 0, 0, offset),
+            self.INFO_HEADER.pack(
+                self.INFO_HEADER.size, pixels, pixels, 1, 1, 0, image_size,
+                self.PIXELS_PER_METER, self.PIXELS_PER_METER, 2, 2
+            ),
+            self.PALETTE,
+        ))
+
+    def _rows(self, packed_rows, row_bytes):
+        row_padding = bytes(self._stride(row_bytes) - row_bytes)
+        for row in packed_rows:
+            yield row + row_padding
+
+
+class ZPLRenderer(_PackedRasterRenderer):
+    """ZPL ^GFA graphic field with ZPL ASCII compression.
+
+    Identical consecutive rows collapse to ``:``, runs of a hex digit use the
+    G-Y/g-z repeat counts and trailing zeros end with ``,``. With
+    ``label=False`` only the ^GFA field is emitted, for embedding in templates.
+    """
+
+    def _header(self, pixels, row_bytes, label=True, x=0, y=0):
+        total = row_bytes * pixels
+        prefix = f"^XA^FO{x},{y}" if label else ""
+        return f"{prefix}^GFA,{total},{total},{row_bytes},".encode('ascii')
+
+    def _rows(self, packed_rows, row_bytes):
+        previous = None
+        for row in packed_rows:
+            if row == previous:
+                yield b':'
+                continue
+            yield self._compress_row(row.hex().upper()).encode('ascii')
+            previous = row
+
+    def _footer(self, label=True, x=0, y=0):
+        return b"^FS^XZ\n" if label else b"^FS\n"
+
+    @staticmethod
+    def _repeat_count(count):
+        # 20, 40, ... 400 map to g..z; 1..19 map to G..Y
+        code = ''
+        if count >= 20:
+            code += chr(ord('g') + count // 20 - 1)
+        if count % 20:
+            code += chr(ord('G') + count % 20 - 1)
+        return code
+
+    def _compress_row(self, hex_row):
+        stripped = hex_row.rstrip('0')
+        if not stripped:
+            return ','
+        out = []
+        i = 0
+        while i < len(stripped):
+            char = stripped[i]
+            run = 1
+            while i + run < len(stripped) and stripped[i + run] == char and run < 419:
+                run += 1
+            out.append(self._repeat_count(run) + char if run > 2 else char * run)
+            i += run
+        if len(stripped) < len(hex_row):
+            out.append(',')
+        return ''.join(out)
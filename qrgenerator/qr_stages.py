@@ -0,0 +1,54 @@
+"""
+Intermediate products of the staged generation API
+
+QRCodeGenerator.encode -> add_ec -> place -> mask produces these values in
+turn. They are immutable, hashable and picklable, so any stage can be cached
+(e.g. keyed by the product itself), shipped to another process or thread, or
+reused, for example to try several masks on one placed symbol.
+"""
+
+from typing import NamedTuple, Tuple
+
+from .qr_matrix import QRMatrix
+
+
+class EncodedData(NamedTuple):
+    """Padded data codewords for one symbol"""
+    version: int
+    ec_level: str
+    mode: int
+    data: bytes
+
+
+class CodewordBlocks(NamedTuple):
+    """Data and EC codewords, block by block, before interleaving"""
+    version: int
+    ec_level: str
+    data_blocks: Tuple[bytes, ...]
+    ec_blocks: Tuple[bytes, ...]
+
+    def interleaved(self) -> bytes:
+        """Final codeword sequence: data column by column, then EC likewise"""
+        result = bytearray()
+        for blocks in (self.data_blocks, self.ec_blocks):
+            for i in range(max(len(block) for block in blocks)):
+                result.extend(block[i] for block in blocks if i < len(block))
+        return bytes(result)
+
+
+class PlacedSymbol(NamedTuple):
+    """Function patterns and data modules of an unmasked symbol.
+
+    Format information modules are still unset (QRMatrix.UNSET).
+    """
+    version: int
+    ec_level: str
+    rows: Tuple[Tuple[int, ...], ...]
+
+    @classmethod
+    def from_matrix(cls, matrix: QRMatrix, ec_level: str) -> 'PlacedSymbol':
+        return cls(matrix.version, ec_level, tuple(tuple(row) for row in matrix.matrix))
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
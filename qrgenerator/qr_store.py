@@ -0,0 +1,233 @@
+"""
+Memory-mapped fixed-record symbol store for bulk jobs
+
+File layout (all integers big-endian):
+  header  - magic, revision, version, record size, record count, index offset
+  records - fixed-size slots: sequence number + QRMatrix.to_bytes() payload
+  index   - (sequence, slot) pairs sorted by sequence, written on close
+
+Records are appended in any sequence order. A store closed without its index
+(e.g. a killed job) is still readable: the index is rebuilt by scanning slots.
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .qr_matrix import QRMatrix
+
+STORE_MAGIC = b'QRSTORE'
+STORE_REVISION = 1
+HEADER = struct.Struct('>7sBBxHQQ4x')
+SEQUENCE = struct.Struct('>Q')
+INDEX_ENTRY = struct.Struct('>QQ')
+
+
+def record_size(version: int) -> int:
+    return SEQUENCE.size + QRMatrix.packed_size(version)
+
+
+class SymbolStoreWriter:
+    """Append-only writer; reopening an existing store continues appending to it.
+
+    A store has a single writer; batch workers hand their symbols to it.
+    """
+
+    def __init__(self, path: str, version: int):
+        self.path = path
+        self.version = version
+        self.record_size = record_size(version)
+        self._entries: List[Tuple[int, int]] = []
+        self._sequences = set()
+        self._next_sequence = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, 'r+b')
+            self._resume()
+        else:
+            self._file = open(path, 'w+b')
+            self._write_header(index_offset=0)
+
+    def __enter__(self) -> 'SymbolStoreWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _resume(self) -> None:
+        with SymbolStore(self.path) as existing:
+            if existing.version != self.version:
+                raise ValueError(
+                    f"Store {self.path} holds version {existing.version}, not {self.version}"
+                )
+            # Slot order: truncate() keeps a prefix of the slots
+            self._entries = sorted(existing.index_entries(), key=lambda entry: entry[1])
+        self._sequences = {sequence for sequence, _ in self._entries}
+        self._next_sequence = max(self._sequences) + 1 if self._sequences else 0
+        # Drop a previously written index; new records go right after the last slot
+        self._file.truncate(HEADER.size + len(self._entries) * self.record_size)
+        self._write_header(index_offset=0)
+
+    def _write_header(self, index_offset: int) -> None:
+        self._file.seek(0)
+        self._file.write(HEADER.pack(
+            STORE_MAGIC, STORE_REVISION, self.version, self.record_size,
+            len(self._entries), index_offset
+        ))
+
+    def append(self, matrix: QRMatrix, sequence: Optional[int] = None) -> int:
+        """Append a symbol; returns its sequence number (next free one by default)"""
+        if matrix.version != self.version:
+            raise ValueError(
+                f"Store holds version {self.version} symbols, got version {matrix.version}"
+            )
+        return self.append_record(matrix.to_bytes(), sequence)
+
+    def append_record(self, payload: bytes, sequence: Optional[int] = None) -> int:
+        """Append an already serialized QRMatrix.to_bytes() payload"""
+        if len(payload) != self.record_size - SEQUENCE.size:
+            raise ValueError(
+                f"Record payload must be {self.record_size - SEQUENCE.size} bytes, got {len(payload)}"
+            )
+        if sequence is None:
+            sequence = self._next_sequence
+        if sequence in self._sequences:
+            raise ValueError(f"Sequence number {sequence} already stored")
+        slot = len(self._entries)
+        self._file.seek(HEADER.size + slot * self.record_size)
+        self._file.write(SEQUENCE.pack(sequence) + bytes(payload))
+        self._entries.append((sequence, slot))
+        self._sequences.add(sequence)
+        self._next_sequence = max(self._next_sequence, sequence + 1)
+        return sequence
+
+    def truncate(self, count: int) -> None:
+        """Drop every record after the first ``count`` slots (roll back to a checkpoint)"""
+        if count > len(self._entries):
+            raise ValueError(f"Store {self.path} holds only {len(self._entries)} records")
+        self._entries = self._entries[:count]
+        self._sequences = {sequence for sequence, _ in self._entries}
+        self._next_sequence = max(self._sequences) + 1 if self._sequences else 0
+        self._file.truncate(HEADER.size + count * self.record_size)
+        self._write_header(index_offset=0)
+
+    def flush(self, sync: bool = False) -> None:
+        """Make appended records readable by other processes (``sync`` also fsyncs)"""
+        self._write_header(index_offset=0)
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        index_offset = HEADER.size + len(self._entries) * self.record_size
+        self._file.seek(index_offset)
+        self._file.write(b''.join(
+            INDEX_ENTRY.pack(sequence, slot) for sequence, slot in sorted(self._entries)
+        ))
+        self._file.truncate()
+        self._write_header(index_offset)
+        self._file.close()
+
+
+class SymbolStore:
+    """Random-access, memory-mapped reader over a symbol store"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a QR symbol store") from None
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a QR symbol store")
+        magic, revision, version, size, count, index_offset = HEADER.unpack_from(self._map)
+        if magic != STORE_MAGIC or revision != STORE_REVISION or not size:
+            self.close()
+            raise ValueError(f"{path} is not a QR symbol store")
+        self.version = version
+        self.record_size = size
+        self._index_offset = index_offset
+        self._scanned: Optional[Dict[int, int]] = None
+        if index_offset:
+            self._count = count
+        else:
+            self._count = (len(self._map) - HEADER.size) // size
+            self._scanned = {
+                SEQUENCE.unpack_from(self._map, HEADER.size + slot * size)[0]: slot
+                for slot in range(self._count)
+            }
+
+    def __enter__(self) -> 'SymbolStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, sequence: int) -> bool:
+        return self._slot(sequence) is not None
+
+    def __getitem__(self, sequence: int) -> QRMatrix:
+        # Decode from a copy: a decode error must not leave the map exported
+        with self.record_bytes(sequence) as record:
+            data = bytes(record)
+        return QRMatrix.from_bytes(data)
+
+    def __iter__(self) -> Iterator[int]:
+        for sequence, _ in self.index_entries():
+            yield sequence
+
+    def index_entries(self) -> List[Tuple[int, int]]:
+        """(sequence, slot) pairs sorted by sequence"""
+        if self._scanned is not None:
+            return sorted(self._scanned.items())
+        return [
+            INDEX_ENTRY.unpack_from(self._map, self._index_offset + i * INDEX_ENTRY.size)
+            for i in range(self._count)
+        ]
+
+    def _slot(self, sequence: int) -> Optional[int]:
+        if self._scanned is not None:
+            return self._scanned.get(sequence)
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            found, slot = INDEX_ENTRY.unpack_from(
+                self._map, self._index_offset + mid * INDEX_ENTRY.size
+            )
+            if found == sequence:
+                return slot
+            if found < sequence:
+                low = mid + 1
+            else:
+                high = mid
+        return None
+
+    def record_bytes(self, sequence: int) -> memoryview:
+        """Zero-copy view of one record's QRMatrix.to_bytes() payload.
+
+        Release the view (or use it as a context manager) before close().
+        """
+        slot = self._slot(sequence)
+        if slot is None:
+            raise KeyError(sequence)
+        start = HEADER.size + slot * self.record_size + SEQUENCE.size
+        return memoryview(self._map)[start:start + self.record_size - SEQUENCE.size]
+
+    def render(self, sequence: int, renderer, **kwargs):
+        """Render one stored symbol on demand with any renderer"""
+        return renderer.render(self[sequence], **kwargs)
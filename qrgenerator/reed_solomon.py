@@ -2,13 +2,24 @@
 Reed-Solomon Error Correction for QR Codes
 """
 
-from .galois_field import GaloisField, Polynomial
+from .galois_field import GaloisField, Polynomial, get_tables
+
+
+# Generator polynomials by EC codeword count, built lazily and shared per process
+_GENERATOR_CACHE = {}
 
 
 class ReedSolomon:
     def __init__(self):
         self.gf = GaloisField()
 
+    def generator_polynomial(self, num_ec_codewords):
+        gen = _GENERATOR_CACHE.get(num_ec_codewords)
+        if gen is None:
+            gen = self.generate_generator_polynomial(num_ec_codewords)
+            _GENERATOR_CACHE[num_ec_codewords] = gen
+        return gen
+
     def generate_generator_polynomial(self, num_ec_codewords):
         gen = Polynomial([1], self.gf)
         for i in range(num_ec_codewords):
@@ -20,7 +31,7 @@ class ReedSolomon:
     def encode(self, data_codewords, num_ec_codewords):
         data_poly_coeffs = list(data_codewords) + [0] * num_ec_codewords
         data_poly = Polynomial(data_poly_coeffs, self.gf)
-        gen_poly = self.generate_generator_polynomial(num_ec_codewords)
+        gen_poly = self.generator_polynomial(num_ec_codewords)
         remainder = data_poly.divide(gen_poly)
         ec_codewords = []
         for i in range(num_ec_codewords - 1, -1, -1):
@@ -28,6 +39,39 @@ class ReedSolomon:
         return ec_codewords
 
 
+class FastReedSolomon:
+    """Table-driven LFSR encoder; output is identical to ReedSolomon.encode"""
+
+    def __init__(self):
+        self.exp_table, self.log_table = get_tables()
+        self._reference = ReedSolomon()
+        self._generator_logs = {}
+
+    def _generator(self, num_ec_codewords):
+        # Logs of the generator coefficients after the leading 1 (None for zero)
+        logs = self._generator_logs.get(num_ec_codewords)
+        if logs is None:
+            coeffs = self._reference.generator_polynomial(num_ec_codewords).coeffs[1:]
+            logs = [self.log_table[c] if c else None for c in coeffs]
+            self._generator_logs[num_ec_codewords] = logs
+        return logs
+
+    def encode(self, data_codewords, num_ec_codewords):
+        exp_table, log_table = self.exp_table, self.log_table
+        generator = self._generator(num_ec_codewords)
+        remainder = [0] * num_ec_codewords
+        for codeword in data_codewords:
+            factor = codeword ^ remainder[0]
+            del remainder[0]
+            remainder.append(0)
+            if factor:
+                factor_log = log_table[factor]
+                for i, coeff_log in enumerate(generator):
+                    if coeff_log is not None:
+                        remainder[i] ^= exp_table[factor_log + coeff_log]
+        return remainder
+
+
 EC_LEVELS = {
     'L': {'numeric': 0b01, 'recovery': 0.07},
     'M': {'numeric': 0b00, 'recovery': 0.15},
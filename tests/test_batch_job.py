@@ -0,0 +1,197 @@
+import json
+
+import pytest
+
+from qrgenerator import QRCodeGenerator
+from qrgenerator.qr_batch_job import (
+    ShardJob, load_manifest, main, manifest_path, merge_shards, parse_shard, run_shard,
+)
+from qrgenerator.qr_store import SymbolStore, SymbolStoreWriter
+
+PAYLOADS = [f'row {i} ' + 'x' * (i * 7 % 60) for i in range(23)]
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / 'input.txt'
+    path.write_text('\n'.join(PAYLOADS) + '\n', encoding='utf-8')
+    return path
+
+
+def read_outputs(directory, pattern='*.qrs'):
+    """sequence -> to_bytes() over every store in a directory"""
+    records = {}
+    for path in sorted(directory.glob(pattern)):
+        with SymbolStore(str(path)) as store:
+            for sequence in store:
+                assert sequence not in records
+                records[sequence] = store[sequence].to_bytes()
+    return records
+
+
+def expected_records(payloads=PAYLOADS, skip=()):
+    generator = QRCodeGenerator(verbose=False)
+    return {
+        row: generator.generate(payload, 'M').to_bytes()
+        for row, payload in enumerate(payloads) if row not in skip
+    }
+
+
+def test_parse_shard():
+    assert parse_shard('2/5') == (2, 5)
+    for text in ('5/5', '-1/2', '1', 'a/b', '0/0'):
+        with pytest.raises(ValueError):
+            parse_shard(text)
+
+
+def test_single_shard_matches_generate(tmp_path, input_file):
+    out = tmp_path / 'out'
+    manifest = run_shard(str(input_file), str(out), checkpoint_every=5)
+    assert manifest['complete'] and manifest['rows_done'] == len(PAYLOADS)
+    assert manifest['failed_rows'] == []
+    assert read_outputs(out) == expected_records()
+    # A complete shard is skipped on the next run
+    assert run_shard(str(input_file), str(out), checkpoint_every=5) == load_manifest(
+        manifest_path(str(out), 0, 1))
+
+
+def test_shards_merge_to_all_rows(tmp_path, input_file):
+    out = tmp_path / 'out'
+    for shard in range(3):
+        run_shard(str(input_file), str(out), shard, 3, checkpoint_every=4)
+        assert all(row % 3 == shard for row in read_outputs(out, f'shard-{shard}-of-3.v*.qrs'))
+    merged = merge_shards(str(out), str(tmp_path / 'merged'))
+    assert set(merged) == {int(path.stem[1:]) for path in (tmp_path / 'merged').glob('v*.qrs')}
+    assert read_outputs(tmp_path / 'merged') == expected_records()
+
+
+def test_merge_refuses_missing_or_incomplete_shards(tmp_path, input_file):
+    out = tmp_path / 'out'
+    run_shard(str(input_file), str(out), 0, 2)
+    with pytest.raises(ValueError, match='Missing shard'):
+        merge_shards(str(out), str(tmp_path / 'merged'))
+    path = manifest_path(str(out), 1, 2)
+    manifest = load_manifest(manifest_path(str(out), 0, 2))
+    manifest.update(shard=1, complete=False, outputs={})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError, match='not complete'):
+        merge_shards(str(out), str(tmp_path / 'merged'))
+
+
+def test_resume_after_interruption(tmp_path, input_file, monkeypatch):
+    out = tmp_path / 'out'
+    calls = []
+    original = ShardJob._checkpoint
+
+    def crash_on_third_checkpoint(self, *args, **kwargs):
+        calls.append(args)
+        if len(calls) == 3:
+            # Symbols of this chunk are already in the stores, past the last checkpoint
+            raise KeyboardInterrupt
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(ShardJob, '_checkpoint', crash_on_third_checkpoint)
+    with pytest.raises(KeyboardInterrupt):
+        run_shard(str(input_file), str(out), checkpoint_every=4)
+    manifest = load_manifest(manifest_path(str(out), 0, 1))
+    assert not manifest['complete'] and manifest['next_row'] == 8
+    monkeypatch.setattr(ShardJob, '_checkpoint', original)
+
+    manifest = run_shard(str(input_file), str(out), checkpoint_every=4)
+    assert manifest['complete'] and manifest['rows_done'] == len(PAYLOADS)
+    assert read_outputs(out) == expected_records()
+
+
+def test_resume_rejects_tampered_store(tmp_path, input_file, monkeypatch):
+    out = tmp_path / 'out'
+    monkeypatch.setattr(ShardJob, '_checkpoint', _checkpoint_then_crash(ShardJob._checkpoint))
+    with pytest.raises(KeyboardInterrupt):
+        run_shard(str(input_file), str(out), checkpoint_every=20)
+    monkeypatch.undo()
+    manifest = load_manifest(manifest_path(str(out), 0, 1))
+    store = out / next(iter(manifest['outputs'].values()))['path']
+    data = bytearray(store.read_bytes())
+    data[40] ^= 0xFF
+    store.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match='checkpoint hash'):
+        run_shard(str(input_file), str(out), checkpoint_every=20)
+
+
+def _checkpoint_then_crash(original):
+    def checkpoint(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        raise KeyboardInterrupt
+    return checkpoint
+
+
+def test_resume_rejects_other_job(tmp_path, input_file):
+    out = tmp_path / 'out'
+    run_shard(str(input_file), str(out), ec_level='M')
+    with pytest.raises(ValueError, match='different job'):
+        run_shard(str(input_file), str(out), ec_level='Q')
+
+
+def test_failed_rows_are_recorded_and_skipped(tmp_path):
+    payloads = list(PAYLOADS)
+    payloads[6] = '!' * 3000  # byte mode, larger than version 40 at EC level M
+    path = tmp_path / 'input.txt'
+    path.write_text('\n'.join(payloads) + '\n', encoding='utf-8')
+    out = tmp_path / 'out'
+    manifest = run_shard(str(path), str(out), checkpoint_every=4)
+    assert manifest['complete']
+    assert [failure['row'] for failure in manifest['failed_rows']] == [6]
+    assert 'too large' in manifest['failed_rows'][0]['error'].lower()
+    assert manifest['rows_done'] == len(payloads) - 1
+    assert read_outputs(out) == expected_records(payloads, skip={6})
+
+
+@pytest.mark.parametrize('options,message', [
+    ({'ec_level': 'X'}, 'Invalid EC level'),
+    ({'ec_level': 'm'}, 'Invalid EC level'),
+    ({'version': 0}, 'Invalid version'),
+    ({'version': 41}, 'Invalid version'),
+])
+def test_invalid_configuration_is_rejected(tmp_path, input_file, options, message):
+    out = tmp_path / 'out'
+    with pytest.raises(ValueError, match=message):
+        ShardJob(str(input_file), str(out), **options)
+    assert not out.exists()
+
+
+def test_cli_reports_invalid_version(tmp_path, input_file, capsys):
+    assert main(['run', str(input_file), str(tmp_path / 'out'), '--version', '41']) == 1
+    assert 'Invalid version 41' in capsys.readouterr().err
+
+
+def test_cli_run_and_merge(tmp_path, input_file, capsys):
+    out, merged = tmp_path / 'out', tmp_path / 'merged'
+    for shard in ('0/2', '1/2'):
+        assert main(['run', str(input_file), str(out), '--shard', shard, '--ec-level', 'M']) == 0
+    assert main(['merge', str(out), str(merged)]) == 0
+    assert 'symbols ->' in capsys.readouterr().out
+    assert main(['run', str(input_file), str(out), '--shard', '2/2']) == 1
+
+
+@pytest.mark.parametrize('level', ['LM', 'MQ', '', 'm'])
+def test_cli_rejects_invalid_ec_level(tmp_path, input_file, level):
+    with pytest.raises(SystemExit) as excinfo:
+        main(['run', str(input_file), str(tmp_path / 'out'), '--ec-level', level])
+    assert excinfo.value.code == 2
+
+
+def test_truncate_after_resume_with_out_of_order_sequences(tmp_path):
+    generator = QRCodeGenerator(verbose=False)
+    symbols = [generator.generate(f'seq {i}', 'M', version=1) for i in range(3)]
+    path = str(tmp_path / 'store.qrs')
+    with SymbolStoreWriter(path, 1) as writer:
+        for symbol, sequence in zip(symbols, (5, 1, 3)):
+            writer.append(symbol, sequence)
+    with SymbolStoreWriter(path, 1) as writer:
+        writer.truncate(2)  # keeps the first two slots: sequences 5 and 1
+        assert writer.append(symbols[2]) == 6
+    with SymbolStore(path) as store:
+        assert list(store) == [1, 5, 6]
+        assert store[5].to_bytes() == symbols[0].to_bytes()
+        assert store[1].to_bytes() == symbols[1].to_bytes()
+        assert store[6].to_bytes() == symbols[2].to_bytes()
@@ -0,0 +1,36 @@
+import pytest
+
+from qrgenerator import QRCodeGenerator
+from qrgenerator.qr_engines import ENGINE_ENV_VAR, STAGES, resolve_engines
+
+
+def test_single_name_and_per_stage_spec():
+    assert resolve_engines('reference') == {stage: 'reference' for stage in STAGES}
+    assert resolve_engines('rs=reference, masking=fast,') == {
+        'rs': 'reference', 'placement': 'fast', 'masking': 'fast',
+    }
+    assert resolve_engines({'placement': 'reference'})['placement'] == 'reference'
+
+
+def test_environment_variable(monkeypatch):
+    monkeypatch.setenv(ENGINE_ENV_VAR, 'rs=reference')
+    assert QRCodeGenerator(verbose=False).engines['rs'] == 'reference'
+
+
+@pytest.mark.parametrize('spec', ['rs=fast,numpy', 'rs=fast, reference ,masking=fast'])
+def test_items_without_stage_are_rejected(spec, monkeypatch):
+    with pytest.raises(ValueError, match='Engine spec items must look like stage=name'):
+        resolve_engines(spec)
+    monkeypatch.setenv(ENGINE_ENV_VAR, spec)
+    with pytest.raises(ValueError, match='stage=name'):
+        QRCodeGenerator(verbose=False)
+
+
+@pytest.mark.parametrize('spec,message', [
+    ('render=fast', 'Unknown stage'),
+    ('rs=turbo', 'Unknown engine'),
+    ('turbo', 'Unknown engine'),
+])
+def test_unknown_stage_or_engine(spec, message):
+    with pytest.raises(ValueError, match=message):
+        resolve_engines(spec)
@@ -0,0 +1,53 @@
+import pytest
+
+from qrgenerator import QRCodeGenerator, QRMatrix
+from qrgenerator.qr_mask_select import format_cells, mask_bitmaps
+from qrgenerator.qr_matrix import NUM_MASK_PATTERNS
+
+
+@pytest.mark.parametrize('version', [1, 7, 21])
+@pytest.mark.parametrize('ec_level', ['L', 'H'])
+def test_format_cells_match_add_format_information(version, ec_level):
+    for mask, writes in enumerate(format_cells(version, ec_level)):
+        probe = QRMatrix(version)
+        probe.add_format_information(ec_level, mask)
+        written = {
+            (r, c): value for r, row in enumerate(probe.matrix)
+            for c, value in enumerate(row) if value != QRMatrix.UNSET
+        }
+        assert writes == written
+        assert list(writes) == list(format_cells(version, ec_level)[0])
+
+
+@pytest.mark.parametrize('version', [1, 8])
+def test_mask_bitmaps_skip_reserved_modules(version):
+    template = QRMatrix(version)
+    template.build_function_patterns()
+    bitmaps = mask_bitmaps(version)
+    assert len(bitmaps) == NUM_MASK_PATTERNS
+    for mask, bitmap in enumerate(bitmaps):
+        for i, row in enumerate(bitmap):
+            for j, value in enumerate(row):
+                expected = 0 if template.reserved[i][j] else int(template._mask_condition(i, j, mask))
+                assert value == expected
+
+
+def test_numpy_engine_uses_shared_tables():
+    np = pytest.importorskip('numpy')
+    from qrgenerator.qr_numpy import NumpyMaskEngine
+    engine = NumpyMaskEngine()
+    assert np.array_equal(engine.mask_bitmaps(5), np.array(mask_bitmaps(5)))
+    rows, cols, values = engine._format_cells(5, 'Q')
+    for mask, writes in enumerate(format_cells(5, 'Q')):
+        assert dict(zip(zip(rows.tolist(), cols.tolist()), values[mask].tolist())) == writes
+
+
+@pytest.mark.parametrize('engine', ['reference', 'fast'])
+def test_batch_masks_match_single_generation(engine):
+    generator = QRCodeGenerator(engine, verbose=False)
+    payloads = [f'batch payload {i}' * (1 + i % 4) for i in range(12)]
+    for use_numpy in (False, None):
+        batch = generator.generate_batch(payloads, 'Q', use_numpy=use_numpy)
+        single = [generator.generate(payload, 'Q') for payload in payloads]
+        assert [(s.version, s.mask_pattern, s.matrix) for s in batch] == \
+            [(s.version, s.mask_pattern, s.matrix) for s in single]
@@ -0,0 +1,86 @@
+import pytest
+
+from qrgenerator import MicroQRMatrix, QRCodeGenerator, QRMatrix
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return QRCodeGenerator(verbose=False)
+
+
+@pytest.mark.parametrize('version', [1, 7, 40])
+def test_bytes_round_trip(generator, version):
+    qr = generator.generate('round trip', 'Q', version=version)
+    data = qr.to_bytes()
+    assert len(data) == QRMatrix.packed_size(version)
+    restored = QRMatrix.from_bytes(data)
+    assert (restored.version, restored.ec_level, restored.mask_pattern) == (version, 'Q', qr.mask_pattern)
+    assert restored.matrix == [[int(module == 1) for module in row] for row in qr.matrix]
+
+
+def test_micro_round_trip(generator):
+    qr = generator.generate_micro('12345')
+    restored = QRMatrix.from_bytes(qr.to_bytes())
+    assert isinstance(restored, MicroQRMatrix)
+    assert restored.name == qr.name
+    assert restored.matrix == qr.matrix
+
+
+def _record(generator, version_byte=None, ec_index=None, mask=None):
+    data = bytearray(generator.generate('header', 'M', version=1).to_bytes())
+    if version_byte is not None:
+        data[3] = version_byte
+    if ec_index is not None:
+        data[4] = ec_index
+    if mask is not None:
+        data[5] = mask
+    return bytes(data)
+
+
+@pytest.mark.parametrize('version_byte', [0, 41, 0x7F, 0x80, 0x85])
+def test_rejects_invalid_version(generator, version_byte):
+    with pytest.raises(ValueError, match='Invalid version'):
+        QRMatrix.from_bytes(_record(generator, version_byte=version_byte))
+
+
+@pytest.mark.parametrize('ec_index', [4, 0xFE])
+def test_rejects_invalid_ec_level(generator, ec_index):
+    with pytest.raises(ValueError, match=f'EC level index {ec_index}'):
+        QRMatrix.from_bytes(_record(generator, ec_index=ec_index))
+
+
+@pytest.mark.parametrize('mask', [8, 9, 0xFE])
+def test_rejects_invalid_mask(generator, mask):
+    with pytest.raises(ValueError, match=f'mask pattern {mask}'):
+        QRMatrix.from_bytes(_record(generator, mask=mask))
+
+
+def test_unset_mask_and_micro_mask_range(generator):
+    assert QRMatrix.from_bytes(_record(generator, mask=QRMatrix.BINARY_UNSET)).mask_pattern is None
+    assert QRMatrix.from_bytes(_record(generator, mask=7)).mask_pattern == 7
+    data = bytearray(generator.generate_micro('12345').to_bytes())
+    data[5] = MicroQRMatrix.NUM_MASK_PATTERNS
+    with pytest.raises(ValueError, match='mask pattern 4'):
+        QRMatrix.from_bytes(bytes(data))
+
+
+def test_to_buffer_is_cached_until_modules_change(generator):
+    qr = generator.generate('buffer', 'M', version=1)
+    buffer = qr.to_buffer()
+    assert buffer.readonly and buffer.shape == (qr.size, qr.size)
+    assert qr.to_buffer() is buffer
+    assert buffer.tolist() == [[int(m == 1) for m in row] for row in qr.matrix]
+    qr.apply_mask(qr.mask_pattern)
+    rebuilt = qr.to_buffer()
+    assert rebuilt is not buffer
+    assert rebuilt.tolist() == [[int(m == 1) for m in row] for row in qr.matrix] != buffer.tolist()
+
+
+def test_rejects_bad_magic_and_truncation(generator):
+    data = generator.generate('header', 'M', version=1).to_bytes()
+    with pytest.raises(ValueError):
+        QRMatrix.from_bytes(b'XX' + data[2:])
+    with pytest.raises(ValueError):
+        QRMatrix.from_bytes(data[:-1])
+    with pytest.raises(ValueError):
+        QRMatrix.from_bytes(data[:3])
@@ -0,0 +1,146 @@
+import re
+import threading
+
+import pytest
+
+import qrgenerator.qr_metrics as qr_metrics
+from qrgenerator import QRCodeGenerator, SVGRenderer
+from qrgenerator.qr_metrics import COUNTER, HISTOGRAM, METRICS, MetricsRegistry
+
+
+@pytest.fixture
+def metrics():
+    was_enabled = METRICS.enabled
+    METRICS.reset()
+    qr_metrics.enable()
+    yield METRICS
+    METRICS.reset()
+    METRICS.enabled = was_enabled
+
+
+def samples(registry, name):
+    return {
+        tuple(sample['labels'].values()): sample
+        for sample in registry.snapshot()[name]['samples']
+    }
+
+
+def payload_sample(registry):
+    return samples(registry, 'qr_payload_bytes').get((), {'sum': 0, 'count': 0})
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry(enabled=True)
+    registry.define('jobs_total', COUNTER, "Jobs", ('kind',))
+    registry.define('latency_seconds', HISTOGRAM, "Latency", ('stage',), (0.1, 1, 10))
+    return registry
+
+
+def test_prometheus_text(registry):
+    registry.inc('jobs_total', ('a',))
+    registry.inc('jobs_total', ('a',), 2)
+    registry.inc('jobs_total', ('b"\n',))
+    for value in (0.05, 0.1, 0.5, 5, 50):
+        registry.observe('latency_seconds', value, ('encode',))
+    assert registry.prometheus_text() == (
+        '# HELP jobs_total Jobs\n'
+        '# TYPE jobs_total counter\n'
+        'jobs_total{kind="a"} 3\n'
+        'jobs_total{kind="b\\"\\n"} 1\n'
+        '# HELP latency_seconds Latency\n'
+        '# TYPE latency_seconds histogram\n'
+        'latency_seconds_bucket{stage="encode",le="0.1"} 2\n'
+        'latency_seconds_bucket{stage="encode",le="1.0"} 3\n'
+        'latency_seconds_bucket{stage="encode",le="10.0"} 4\n'
+        'latency_seconds_bucket{stage="encode",le="+Inf"} 5\n'
+        'latency_seconds_sum{stage="encode"} 55.65\n'
+        'latency_seconds_count{stage="encode"} 5\n'
+    )
+
+
+def test_disabled_registry_records_nothing(registry):
+    registry.enabled = False
+    registry.inc('jobs_total', ('a',))
+    registry.observe('latency_seconds', 1, ('encode',))
+    registry.cache_lookup('plan', True)
+    with registry.time('encode'):
+        pass
+    assert all(not metric['samples'] for metric in registry.snapshot().values())
+    assert registry._shards == []
+
+
+def test_disabled_global_registry_records_nothing(metrics):
+    qr_metrics.disable()
+    SVGRenderer().render(QRCodeGenerator(verbose=False).generate('off'))
+    assert all(not metric['samples'] for metric in metrics.snapshot().values())
+
+
+def test_exited_threads_are_folded_into_one_shard(registry):
+    def work():
+        for _ in range(10):
+            registry.inc('jobs_total', ('a',))
+            registry.observe('latency_seconds', 0.5, ('mask',))
+
+    for _ in range(4):
+        threads = [threading.Thread(target=work) for _ in range(25)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert samples(registry, 'jobs_total')[('a',)]['value'] == 1000
+    histogram = samples(registry, 'latency_seconds')[('mask',)]
+    assert histogram['count'] == 1000 and histogram['sum'] == 500
+    assert histogram['buckets'] == {'0.1': 0, '1.0': 1000, '10.0': 1000, '+Inf': 1000}
+    assert len(registry._shards) <= 1
+    registry.reset()
+    assert samples(registry, 'jobs_total') == {}
+
+
+def test_generation_metrics(metrics):
+    generator = QRCodeGenerator(verbose=False)
+    generator.generate('HELLO', 'Q')
+    generator.generate_batch(['HELLO', 'WORLD'], 'Q')
+    SVGRenderer().render(generator.generate('x' * 40, 'L'))
+    generated = {labels: sample['value'] for labels, sample in samples(metrics, 'qr_codes_generated_total').items()}
+    assert generated == {('1', 'Q'): 3, ('2', 'L'): 1}
+    stages = samples(metrics, 'qr_stage_duration_seconds')
+    assert {'encode', 'rs', 'placement', 'mask', 'render'} <= {labels[0] for labels in stages}
+    assert stages[('render',)]['count'] == 1
+    assert stages[('encode',)]['count'] == 4
+    for sample in stages.values():
+        counts = list(sample['buckets'].values())
+        assert counts == sorted(counts) and counts[-1] == sample['count'] and sample['sum'] > 0
+    cache = {labels: sample['value'] for labels, sample in samples(metrics, 'qr_cache_requests_total').items()}
+    # Function patterns are cached per generator: built once per version, then reused
+    assert cache[('function_template', 'miss')] == 2
+    assert cache[('function_template', 'hit')] == 2
+
+
+def test_prometheus_text_of_generation(metrics):
+    QRCodeGenerator(verbose=False).generate('HELLO', 'H')
+    text = qr_metrics.prometheus_text()
+    assert 'qr_codes_generated_total{version="1",ec_level="H"} 1\n' in text
+    assert '# TYPE qr_stage_duration_seconds histogram\n' in text
+    assert re.search(r'^qr_stage_duration_seconds_bucket\{stage="mask",le="\+Inf"\} 1$', text, re.M)
+    assert 'qr_payload_bytes_bucket{le="8.0"} 1\n' in text
+    assert 'qr_payload_bytes_sum 5.0\nqr_payload_bytes_count 1\n' in text
+
+
+@pytest.mark.parametrize('data', ['héllo wörld ✓', b'\x00\xffraw', '0123456789', 'HELLO WORLD'])
+def test_payload_bytes_come_from_the_encoder(metrics, data):
+    QRCodeGenerator(verbose=False).generate(data)
+    expected = len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+    sample = payload_sample(metrics)
+    assert sample['sum'] == expected
+    assert sample['count'] == 1
+
+
+def test_micro_fallback_and_batch_count_each_symbol_once(metrics):
+    generator = QRCodeGenerator(verbose=False)
+    generator.generate('x' * 40, micro=True)  # too long for Micro QR, falls back to QR
+    generator.generate_batch(['a', 'bb', 'ccc'])
+    generator.generate_micro('12345')
+    sample = payload_sample(metrics)
+    assert sample['sum'] == 40 + 6 + 5
+    assert sample['count'] == 5
@@ -0,0 +1,139 @@
+import pytest
+
+from qrgenerator import MicroQRMatrix, QRCodeGenerator, SVGRenderer
+from qrgenerator.qr_micro import (
+    MICRO_DATA_BITS, MICRO_EC_CODEWORDS, MICRO_EC_LEVELS, MicroQREncoder, parse_micro_version,
+)
+
+# Cross-checked against an independent Micro QR implementation
+GOLDEN = {
+    ('12345', 'M1', None): [
+        '11111110101',
+        '10000010110',
+        '10111010100',
+        '10111010000',
+        '10111010111',
+        '10000010011',
+        '11111110100',
+        '00000000011',
+        '11001110011',
+        '01010001100',
+        '11110000011',
+    ],
+    ('HELLO', 'M2', 'L'): [
+        '1111111010101',
+        '1000001000110',
+        '1011101010111',
+        '1011101010111',
+        '1011101011100',
+        '1000001000001',
+        '1111111011101',
+        '0000000000010',
+        '1101010111111',
+        '0100010100101',
+        '1101011001001',
+        '0101001110010',
+        '1011000101000',
+    ],
+    ('Micro!', 'M4', 'L'): [
+        '11111110101010101',
+        '10000010100001011',
+        '10111010001000011',
+        '10111010100010001',
+        '10111010001001001',
+        '10000010111101010',
+        '11111110110111010',
+        '00000000011101101',
+        '10010111011110001',
+        '01011110000000010',
+        '11011100001001000',
+        '01100111000010000',
+        '10001110001000101',
+        '01100001011000001',
+        '11001101110111101',
+        '00101111011000000',
+        '10011100011111101',
+    ],
+}
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return QRCodeGenerator(verbose=False)
+
+
+@pytest.mark.parametrize('key', list(GOLDEN))
+def test_golden_symbols(generator, key):
+    data, version, ec_level = key
+    qr = generator.generate_micro(data, ec_level=ec_level, version=version)
+    assert isinstance(qr, MicroQRMatrix)
+    assert (qr.name, qr.ec_level) == (version, ec_level)
+    assert [''.join(str(m) for m in row) for row in qr.matrix] == GOLDEN[key]
+
+
+@pytest.mark.parametrize('data,name', [
+    ('12345', 'M1'),
+    ('123456', 'M2'),
+    ('HELLO', 'M2'),
+    ('hello', 'M2'),     # text is upper-cased into alphanumeric mode
+    ('Hi!', 'M3'),
+    ('0' * 35, 'M4'),
+])
+def test_smallest_version_is_chosen(generator, data, name):
+    assert generator.generate_micro(data).name == name
+
+
+def test_generate_micro_flag(generator):
+    # generate() defaults to EC level M, which M1 (error detection only) lacks
+    qr = generator.generate('12345', micro=True)
+    assert (qr.name, qr.ec_level) == ('M2', 'M')
+
+
+def test_boost_ec(generator):
+    assert generator.generate_micro('HELLO', ec_level='L', version='M4').ec_level == 'L'
+    assert generator.generate_micro('HELLO', ec_level='L', version='M4', boost_ec=True).ec_level == 'Q'
+
+
+@pytest.mark.parametrize('data,kwargs,message', [
+    ('x' * 40, {}, 'Micro'),
+    ('12345678', {'version': 'M1'}, 'M1'),
+    ('HELLO', {'ec_level': 'H'}, 'not H'),
+])
+def test_data_that_does_not_fit(generator, data, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        generator.generate_micro(data, **kwargs)
+
+
+def test_parse_micro_version():
+    assert parse_micro_version('m3') == 3
+    assert parse_micro_version(4) == 4
+    for value in ('M5', 0, 'X1', None):
+        with pytest.raises(ValueError):
+            parse_micro_version(value)
+
+
+@pytest.mark.parametrize('version', [1, 2, 3, 4])
+def test_padding_fills_capacity(version):
+    encoder = MicroQREncoder()
+    for ec_level in MICRO_EC_LEVELS[version]:
+        bits = encoder.add_micro_padding([1], version, ec_level)
+        assert len(bits) == MICRO_DATA_BITS[(version, ec_level)]
+
+
+def test_structure(generator):
+    for version in (1, 2, 3, 4):
+        qr = generator.generate_micro('1', version=version)
+        assert qr.size == 2 * version + 9
+        assert qr.QUIET_ZONE == 2
+        assert qr.mask_pattern in range(MicroQRMatrix.NUM_MASK_PATTERNS)
+        # Timing patterns along row 0 and column 0
+        assert [qr.matrix[0][i] for i in range(8, qr.size)] == [(i + 1) % 2 for i in range(8, qr.size)]
+        assert [qr.matrix[i][0] for i in range(8, qr.size)] == [(i + 1) % 2 for i in range(8, qr.size)]
+        assert qr.ec_level in MICRO_EC_LEVELS[version]
+        assert (version, qr.ec_level) in MICRO_EC_CODEWORDS
+
+
+def test_renders_with_micro_quiet_zone(generator):
+    qr = generator.generate_micro('12345')
+    svg = SVGRenderer().render(qr, module_size=1, border=qr.QUIET_ZONE)
+    assert f'width="{qr.size + 4}"' in svg
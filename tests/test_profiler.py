@@ -0,0 +1,55 @@
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from qrgenerator import QRCodeGenerator, QRProfiler
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_stage_records_time_and_peak():
+    with QRProfiler(cpu=False) as profiler:
+        with profiler.stage('generate'):
+            QRCodeGenerator(verbose=False).generate('profile me')
+    entry = profiler.stages['generate']
+    assert entry['calls'] == 1
+    assert entry['seconds'] > 0
+    if hasattr(tracemalloc, 'reset_peak'):
+        assert entry['peak_bytes'] > 0
+
+
+def test_peak_unavailable_without_reset_peak(monkeypatch):
+    # Python 3.8 has no tracemalloc.reset_peak(): peaks must not be reported
+    monkeypatch.delattr(tracemalloc, 'reset_peak', raising=False)
+    with QRProfiler(cpu=False) as profiler:
+        with profiler.stage('first'):
+            QRCodeGenerator(verbose=False).generate('first stage')
+        with profiler.stage('second'):
+            QRCodeGenerator(verbose=False).generate('second stage')
+    assert profiler.stages['second']['peak_bytes'] is None
+    assert 'peak=n/a' in profiler.report()
+
+
+def test_cli_rejects_empty_profile_path():
+    result = subprocess.run(
+        [sys.executable, str(ROOT / 'generate_qr.py'), 'hello', 'M', '--profile='],
+        capture_output=True, text=True, cwd=str(ROOT),
+    )
+    assert result.returncode == 1
+    assert '--profile=' in result.stdout
+
+
+@pytest.mark.parametrize('flag', ['--profile', '--profile=run.pstats'])
+def test_cli_profile(tmp_path, flag):
+    result = subprocess.run(
+        [sys.executable, str(ROOT / 'generate_qr.py'), 'hello', 'M', flag],
+        capture_output=True, text=True, cwd=str(tmp_path),
+        env={'PYTHONPATH': str(ROOT), 'PYTHONIOENCODING': 'utf-8'},
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'Stages:' in result.stdout
+    if '=' in flag:
+        assert (tmp_path / 'run.pstats').exists()
@@ -0,0 +1,202 @@
+import io
+import re
+import struct
+
+import pytest
+
+from qrgenerator import (
+    ASCIIRenderer, BMPRenderer, PBMRenderer, QRCodeGenerator, QRMatrix, SVGRenderer, ZPLRenderer,
+)
+from qrgenerator.qr_layout import get_layout_plan
+from qrgenerator.qr_renderer import ImageRenderer
+
+
+@pytest.fixture(scope='module', params=['qr', 'micro'])
+def symbol(request):
+    generator = QRCodeGenerator(verbose=False)
+    if request.param == 'micro':
+        return generator.generate_micro('12345')
+    return generator.generate('https://example.com/renderers', 'Q')
+
+
+def expected_pixels(matrix, module_size, border):
+    """Pixel rows (1 = dark) of the symbol with its quiet zone, top to bottom"""
+    width = matrix.size + 2 * border
+    modules = [[0] * width for _ in range(border)]
+    modules += [[0] * border + [int(m == 1) for m in row] + [0] * border for row in matrix.matrix]
+    modules += [[0] * width for _ in range(border)]
+    return [
+        [value for value in row for _ in range(module_size)]
+        for row in modules for _ in range(module_size)
+    ]
+
+
+def unpack_row(data, pixels):
+    bits = ''.join(format(byte, '08b') for byte in data)
+    return [int(bit) for bit in bits[:pixels]]
+
+
+def decode_zpl_rows(field, row_bytes, height):
+    """Expand the ZPL ASCII compression of a ^GFA data field back to hex rows"""
+    def repeat(code):
+        count = 0
+        for char in code:
+            count += (ord(char) - ord('g') + 1) * 20 if char.islower() else ord(char) - ord('G') + 1
+        return count
+
+    full = row_bytes * 2
+    rows = []
+    for token in re.findall(r'[G-Yg-z]*[0-9A-F]|,|:', field):
+        if token == ':':
+            rows.append(rows[-1])
+            continue
+        if not rows or len(rows[-1]) == full:
+            rows.append('')
+        if token == ',':
+            rows[-1] = rows[-1].ljust(full, '0')
+        else:
+            rows[-1] += repeat(token[:-1]) * token[-1] if len(token) > 1 else token
+    assert len(rows) == height and all(len(row) == full for row in rows)
+    return rows
+
+
+@pytest.mark.parametrize('module_size,border', [(1, 0), (3, 2), (4, 4)])
+def test_pbm(symbol, module_size, border):
+    data = PBMRenderer().render(symbol, module_size=module_size, border=border)
+    pixels = (symbol.size + 2 * border) * module_size
+    header = f"P4\n{pixels} {pixels}\n".encode('ascii')
+    assert data.startswith(header)
+    row_bytes = (pixels + 7) // 8
+    body = data[len(header):]
+    assert len(body) == row_bytes * pixels
+    rows = [unpack_row(body[i:i + row_bytes], pixels) for i in range(0, len(body), row_bytes)]
+    assert rows == expected_pixels(symbol, module_size, border)
+
+
+@pytest.mark.parametrize('module_size,border', [(1, 0), (2, 4), (5, 1)])
+def test_bmp(symbol, module_size, border):
+    data = BMPRenderer().render(symbol, module_size=module_size, border=border)
+    magic, file_size, _, _, offset = struct.unpack_from('<2sIHHI', data)
+    assert magic == b'BM' and file_size == len(data)
+    _, width, height, planes, bpp = struct.unpack_from('<IiiHH', data, 14)
+    pixels = (symbol.size + 2 * border) * module_size
+    assert (width, height, planes, bpp) == (pixels, pixels, 1, 1)
+    stride = ((pixels + 7) // 8 + 3) & ~3
+    assert len(data) - offset == stride * pixels
+    rows = [unpack_row(data[offset + i * stride:offset + (i + 1) * stride], pixels)
+            for i in range(pixels)]
+    assert rows[::-1] == expected_pixels(symbol, module_size, border)
+
+
+@pytest.mark.parametrize('module_size,border', [(1, 0), (4, 4), (7, 2)])
+def test_zpl(symbol, module_size, border):
+    text = ZPLRenderer().render(symbol, module_size=module_size, border=border).decode('ascii')
+    match = re.fullmatch(r'\^XA\^FO0,0\^GFA,(\d+),(\d+),(\d+),(.*)\^FS\^XZ\n', text, re.S)
+    assert match
+    total, _, row_bytes, field = int(match[1]), match[2], int(match[3]), match[4]
+    pixels = (symbol.size + 2 * border) * module_size
+    assert row_bytes == (pixels + 7) // 8 and total == row_bytes * pixels
+    rows = [unpack_row(bytes.fromhex(row), pixels) for row in decode_zpl_rows(field, row_bytes, pixels)]
+    assert rows == expected_pixels(symbol, module_size, border)
+
+
+def test_zpl_field_only_and_position(symbol):
+    field = ZPLRenderer().render(symbol, label=False)
+    assert field.startswith(b'^GFA,') and field.endswith(b'^FS\n')
+    assert ZPLRenderer().render(symbol, x=30, y=40).startswith(b'^XA^FO30,40^GFA,')
+
+
+def test_zpl_repeat_counts():
+    assert ZPLRenderer._repeat_count(1) == 'G'
+    assert ZPLRenderer._repeat_count(19) == 'Y'
+    assert ZPLRenderer._repeat_count(20) == 'g'
+    assert ZPLRenderer._repeat_count(45) == 'hK'
+    assert ZPLRenderer()._compress_row('FFFFF000') == 'KF,'
+    assert ZPLRenderer()._compress_row('0000') == ','
+
+
+class SocketSink:
+    def __init__(self):
+        self.chunks = []
+
+    def sendall(self, data):
+        self.chunks.append(bytes(data))
+
+
+@pytest.mark.parametrize('renderer', [PBMRenderer(), BMPRenderer(), ZPLRenderer()])
+def test_write_streams_to_file_and_socket_sinks(symbol, renderer):
+    expected = renderer.render(symbol, module_size=2, border=1)
+    buffer = io.BytesIO()
+    renderer.write(symbol, buffer, module_size=2, border=1)
+    sink = SocketSink()
+    renderer.write(symbol, sink, module_size=2, border=1)
+    assert buffer.getvalue() == expected == b''.join(sink.chunks)
+    assert len(sink.chunks) > 2
+
+
+@pytest.mark.parametrize('module_size', [0, -1, 1.5])
+def test_rejects_invalid_module_size(symbol, module_size):
+    with pytest.raises(ValueError, match='module_size'):
+        PBMRenderer().render(symbol, module_size=module_size)
+
+
+def test_packed_raster_base_requires_header():
+    from qrgenerator.qr_renderer import _PackedRasterRenderer
+    with pytest.raises(TypeError):
+        _PackedRasterRenderer()
+
+
+def dark_cells(matrix):
+    return {(c, r) for r, row in enumerate(matrix.matrix) for c, m in enumerate(row) if m == 1}
+
+
+def test_ascii_and_image(symbol):
+    lines = ImageRenderer().render(symbol, module_char='#', empty_char='.', border=1).split('\n')
+    assert lines[1:-1] == [
+        '#' + ''.join('#' if m == 1 else '.' for m in row) + '#' for row in symbol.matrix
+    ]
+    assert lines[0] == lines[-1] == '#' * (symbol.size + 2)
+    ascii_lines = ASCIIRenderer().render(symbol, border=0).split('\n')
+    assert ascii_lines == [''.join('██' if m == 1 else '  ' for m in row) for row in symbol.matrix]
+
+
+def test_svg_rectangles_cover_dark_modules_once(symbol):
+    svg = SVGRenderer().render(symbol, module_size=1, border=0)
+    covered = []
+    for x, y, w, h in re.findall(r'<rect x="(\d+)" y="(\d+)" width="(\d+)" height="(\d+)"/>', svg):
+        x, y, w, h = int(x), int(y), int(w), int(h)
+        covered += [(col, row) for row in range(y, y + h) for col in range(x, x + w)]
+    assert len(covered) == len(set(covered))
+    assert set(covered) == dark_cells(symbol)
+
+
+class PlainMatrix:
+    """Matrix-like object without the run-length helpers"""
+
+    def __init__(self, matrix):
+        self.size = matrix.size
+        self.matrix = [list(row) for row in matrix.matrix]
+
+
+@pytest.mark.parametrize('renderer', [ASCIIRenderer(), ImageRenderer(), SVGRenderer(), PBMRenderer()])
+def test_duck_typed_matrix(symbol, renderer):
+    assert renderer.render(PlainMatrix(symbol)) == renderer.render(symbol)
+
+
+def test_runs_follow_grid_writes():
+    matrix = QRMatrix(2)
+    matrix.build_function_patterns()
+    before = SVGRenderer().render(matrix)
+    plan = get_layout_plan(2, 'M')
+    data_blocks = [[0xA5] * len(block) for block in plan.data_positions]
+    ec_blocks = [[0x3C] * len(block) for block in plan.ec_positions]
+    plan.fill(matrix, data_blocks, ec_blocks)
+    after_fill = SVGRenderer().render(matrix)
+    assert after_fill != before
+    matrix.apply_mask(3)
+    matrix.add_format_information('M', 3)
+    assert SVGRenderer().render(matrix) == SVGRenderer().render(PlainMatrix(matrix)) != after_fill
+    assert set(
+        (start + offset, y) for y, runs in enumerate(matrix.dark_runs())
+        for start, length in runs for offset in range(length)
+    ) == dark_cells(matrix)
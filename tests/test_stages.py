@@ -0,0 +1,112 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from qrgenerator import QRCodeGenerator, QRMatrix
+from qrgenerator.qr_stages import CodewordBlocks, EncodedData, PlacedSymbol
+
+PAYLOADS = ['HELLO WORLD', '0123456789' * 8, 'https://example.com/stages?q=ü', b'\x00\xff' * 90]
+
+
+@pytest.fixture(scope='module', params=['reference', 'fast', 'numpy'])
+def generator(request):
+    return QRCodeGenerator(request.param, verbose=False)
+
+
+def run_stages(generator, data, ec_level='M', mask_pattern=None, **kwargs):
+    encoded = generator.encode(data, ec_level, **kwargs)
+    codewords = generator.add_ec(encoded)
+    placed = generator.place(codewords)
+    return encoded, codewords, placed, generator.mask(placed, mask_pattern)
+
+
+@pytest.mark.parametrize('data', PAYLOADS)
+@pytest.mark.parametrize('ec_level', ['L', 'H'])
+def test_stages_match_generate(generator, data, ec_level):
+    *_, symbol = run_stages(generator, data, ec_level)
+    expected = generator.generate(data, ec_level)
+    assert (symbol.version, symbol.ec_level, symbol.mask_pattern) == \
+        (expected.version, expected.ec_level, expected.mask_pattern)
+    assert symbol.matrix == expected.matrix
+
+
+def test_stages_match_generate_with_options(generator):
+    options = {'min_version': 5, 'boost_ec': True}
+    *_, symbol = run_stages(generator, 'boosted', 'L', **options)
+    assert symbol.to_bytes() == generator.generate('boosted', 'L', **options).to_bytes()
+    assert (symbol.version, symbol.ec_level) == (5, 'H')
+
+
+def test_products_hash_and_pickle(generator):
+    products = run_stages(generator, PAYLOADS[2], 'Q')[:3]
+    assert [type(p) for p in products] == [EncodedData, CodewordBlocks, PlacedSymbol]
+    for product in products:
+        restored = pickle.loads(pickle.dumps(product))
+        assert restored == product and hash(restored) == hash(product)
+    again = run_stages(generator, PAYLOADS[2], 'Q')[:3]
+    assert {p: i for i, p in enumerate(products)} == {p: i for i, p in enumerate(again)}
+    encoded, codewords, placed = products
+    assert placed.size == 4 * placed.version + 17
+    assert sum(map(len, codewords.data_blocks)) == len(encoded.data)
+
+
+def test_add_ec_in_process_pool(generator):
+    encoded = [generator.encode(data, 'Q') for data in PAYLOADS]
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        codewords = list(pool.map(generator.add_ec, encoded))
+    assert codewords == [generator.add_ec(e) for e in encoded]
+    symbols = [generator.mask(generator.place(c)) for c in codewords]
+    assert [s.to_bytes() for s in symbols] == [generator.generate(d, 'Q').to_bytes() for d in PAYLOADS]
+
+
+@pytest.mark.parametrize('mask_pattern', range(8))
+def test_pinned_mask_pattern(generator, mask_pattern):
+    *_, placed, symbol = run_stages(generator, 'pinned', 'M', mask_pattern)
+    assert symbol.mask_pattern == mask_pattern
+    expected = QRMatrix(placed.version)
+    expected.build_function_patterns()
+    expected.matrix = [list(row) for row in placed.rows]
+    expected.apply_mask(mask_pattern)
+    expected.add_format_information('M', mask_pattern)
+    assert symbol.matrix == expected.matrix
+    if mask_pattern == generator.generate('pinned', 'M').mask_pattern:
+        assert symbol.to_bytes() == generator.generate('pinned', 'M').to_bytes()
+    # The placed symbol is reusable: masking it again gives the same result
+    assert generator.mask(placed, mask_pattern).matrix == symbol.matrix
+
+
+@pytest.mark.parametrize('mask_pattern', [-1, 8])
+def test_rejects_invalid_mask_pattern(generator, mask_pattern):
+    placed = run_stages(generator, 'x')[2]
+    with pytest.raises(ValueError, match='Invalid mask pattern'):
+        generator.mask(placed, mask_pattern)
+
+
+def test_add_ec_rejects_wrong_data_length(generator):
+    with pytest.raises(ValueError, match='needs 16 data codewords, got 3'):
+        generator.add_ec(EncodedData(1, 'M', 4, b'\x00' * 3))
+    with pytest.raises(ValueError, match='Invalid version'):
+        generator.add_ec(EncodedData(41, 'M', 4, b''))
+
+
+def test_place_rejects_mismatched_blocks(generator):
+    codewords = run_stages(generator, 'x', 'M', version=1)[1]
+    with pytest.raises(ValueError, match='do not match version 1-M'):
+        generator.place(codewords._replace(data_blocks=(b'\x00' * 3,)))
+    with pytest.raises(ValueError, match='do not match version 2-M'):
+        generator.place(codewords._replace(version=2))
+
+
+def test_mask_rejects_invalid_placed_symbol(generator):
+    placed = run_stages(generator, 'x', 'M', version=2)[2]
+    with pytest.raises(ValueError, match='Invalid version 0'):
+        generator.mask(placed._replace(version=0))
+    with pytest.raises(ValueError, match='EC level X'):
+        generator.mask(placed._replace(ec_level='X'))
+    with pytest.raises(ValueError, match='version 1 requires'):
+        generator.mask(placed._replace(version=1))
+    with pytest.raises(ValueError, match='25x25'):
+        generator.mask(placed._replace(rows=placed.rows[:-1]))
+    with pytest.raises(ValueError, match='25x25'):
+        generator.mask(placed._replace(rows=placed.rows[:-1] + (placed.rows[-1][:-1],)))
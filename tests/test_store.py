@@ -0,0 +1,131 @@
+import mmap
+
+import pytest
+
+import qrgenerator.qr_store as qr_store
+from qrgenerator import QRCodeGenerator, SVGRenderer
+from qrgenerator.qr_store import HEADER, SEQUENCE, SymbolStore, SymbolStoreWriter, record_size
+
+VERSION = 2
+
+
+@pytest.fixture(scope='module')
+def symbols():
+    generator = QRCodeGenerator(verbose=False)
+    return [generator.generate(f'store {i}', 'M', version=VERSION) for i in range(6)]
+
+
+def _write(path, symbols, sequences, close=True):
+    writer = SymbolStoreWriter(str(path), VERSION)
+    for symbol, sequence in zip(symbols, sequences):
+        writer.append(symbol, sequence)
+    if close:
+        writer.close()
+    return writer
+
+
+def test_round_trip_out_of_order(tmp_path, symbols):
+    path = tmp_path / 'a.qrs'
+    _write(path, symbols, [5, 1, 3, 0])
+    with SymbolStore(str(path)) as store:
+        assert store.version == VERSION
+        assert len(store) == 4
+        assert list(store) == [0, 1, 3, 5]
+        assert 3 in store and 2 not in store
+        assert store[5].to_bytes() == symbols[0].to_bytes()
+        assert store[0].to_bytes() == symbols[3].to_bytes()
+        with store.record_bytes(1) as record:
+            assert bytes(record) == symbols[1].to_bytes()
+        assert store.render(3, SVGRenderer()) == SVGRenderer().render(store[3])
+        with pytest.raises(KeyError):
+            store[2]
+    assert path.stat().st_size == HEADER.size + 4 * (record_size(VERSION) + 16)
+
+
+def test_default_sequences_and_duplicates(tmp_path, symbols):
+    writer = SymbolStoreWriter(str(tmp_path / 'b.qrs'), VERSION)
+    assert [writer.append(symbol) for symbol in symbols[:3]] == [0, 1, 2]
+    assert writer.append(symbols[3], 10) == 10
+    assert writer.append(symbols[4]) == 11
+    with pytest.raises(ValueError, match='already stored'):
+        writer.append(symbols[5], 1)
+    writer.close()
+
+
+def test_rejects_other_versions(tmp_path, symbols):
+    other = QRCodeGenerator(verbose=False).generate('v3', 'M', version=3)
+    with SymbolStoreWriter(str(tmp_path / 'c.qrs'), VERSION) as writer:
+        with pytest.raises(ValueError, match='version'):
+            writer.append(other)
+        with pytest.raises(ValueError, match='bytes'):
+            writer.append_record(b'short')
+    with pytest.raises(ValueError, match='holds version'):
+        SymbolStoreWriter(str(tmp_path / 'c.qrs'), 3)
+
+
+def test_reopen_continues_appending(tmp_path, symbols):
+    path = tmp_path / 'd.qrs'
+    _write(path, symbols[:2], [4, 2])
+    with SymbolStoreWriter(str(path), VERSION) as writer:
+        assert len(writer) == 2
+        assert writer.append(symbols[2]) == 5
+    with SymbolStore(str(path)) as store:
+        assert list(store) == [2, 4, 5]
+        assert store[5].to_bytes() == symbols[2].to_bytes()
+
+
+def test_store_without_index_is_readable(tmp_path, symbols):
+    # A killed job leaves flushed records but no index
+    path = tmp_path / 'e.qrs'
+    writer = _write(path, symbols[:3], [7, 3, 9], close=False)
+    writer.flush(sync=True)
+    with SymbolStore(str(path)) as store:
+        assert list(store) == [3, 7, 9]
+        assert store[9].to_bytes() == symbols[2].to_bytes()
+    writer.close()
+
+
+def test_decode_error_is_not_masked(tmp_path, symbols):
+    path = tmp_path / 'f.qrs'
+    _write(path, symbols[:1], [0])
+    with open(path, 'r+b') as f:
+        f.seek(HEADER.size + SEQUENCE.size)
+        f.write(b'XX')
+    store = SymbolStore(str(path))
+    try:
+        store[0]
+    except ValueError as exc:
+        # Closing while the error is being handled must not raise BufferError
+        store.close()
+        assert 'Not a QRMatrix binary record' in str(exc)
+    else:
+        pytest.fail("corrupt record decoded")
+
+
+class _Tracker:
+    def __init__(self, monkeypatch):
+        self.files = []
+        self.maps = []
+        real_open, real_mmap = open, mmap.mmap
+
+        def tracked_open(*args, **kwargs):
+            self.files.append(real_open(*args, **kwargs))
+            return self.files[-1]
+
+        def tracked_mmap(*args, **kwargs):
+            self.maps.append(real_mmap(*args, **kwargs))
+            return self.maps[-1]
+
+        monkeypatch.setattr(qr_store, 'open', tracked_open, raising=False)
+        monkeypatch.setattr(qr_store.mmap, 'mmap', tracked_mmap)
+
+
+@pytest.mark.parametrize('content', [b'', b'QRSTORE', b'NOTASTORE' + bytes(40)])
+def test_invalid_store_closes_file_and_map(tmp_path, monkeypatch, content):
+    path = tmp_path / 'bad.qrs'
+    path.write_bytes(content)
+    tracker = _Tracker(monkeypatch)
+    with pytest.raises(ValueError, match='not a QR symbol store'):
+        SymbolStore(str(path))
+    assert tracker.files and all(f.closed for f in tracker.files)
+    assert all(m.closed for m in tracker.maps)
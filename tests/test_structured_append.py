@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+
+import pytest
+
+from qrgenerator import QRCodeGenerator
+from qrgenerator.qr_encoder import MODE_ALPHANUMERIC, MODE_BYTE, MODE_NUMERIC, QREncoder
+
+
+class RecordingExecutor:
+    """Runs jobs in-process and keeps them, so the Structured Append headers can be checked"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def map(self, func, jobs):
+        self.jobs = list(jobs)
+        return map(func, self.jobs)
+
+
+def _xor(data: bytes) -> int:
+    return reduce(lambda a, b: a ^ b, data, 0)
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return QRCodeGenerator(verbose=False)
+
+
+def test_segment_bytes():
+    encoder = QREncoder()
+    assert encoder.segment_bytes('abc/1', MODE_ALPHANUMERIC) == b'ABC/1'
+    assert encoder.segment_bytes('0123', MODE_NUMERIC) == b'0123'
+    assert bytes(encoder.segment_bytes('Καλή', MODE_BYTE)) == 'Καλή'.encode('utf-8')
+    assert bytes(encoder.segment_bytes(b'\x00\xff', MODE_BYTE)) == b'\x00\xff'
+
+
+def test_parity_covers_upper_cased_alphanumeric_data(generator):
+    data = 'https://example.com/' + 'abcdefghij' * 12
+    executor = RecordingExecutor()
+    symbols = generator.generate_structured_append(data, 'H', max_version=3, executor=executor)
+    assert len(symbols) == len(executor.jobs) > 1
+    parities = {job[4] for job in executor.jobs}
+    assert parities == {_xor(data.upper().encode('ascii'))}
+    assert _xor(data.encode('ascii')) not in parities
+
+
+def test_parity_for_mixed_modes(generator):
+    # Parts end up in different modes; each contributes the bytes it encodes
+    data = '1234567890' * 8 + 'hello world! ' * 6
+    executor = RecordingExecutor()
+    generator.generate_structured_append(data, 'M', max_version=2, executor=executor)
+    encoder = generator.encoder
+    parts = [job[1] for job in executor.jobs]
+    assert ''.join(parts) == data
+    assert len({encoder.detect_mode(part) for part in parts}) > 1
+    expected = b''.join(
+        bytes(encoder.segment_bytes(part, encoder.detect_mode(part))) for part in parts
+    )
+    assert {job[4] for job in executor.jobs} == {_xor(expected)}
+
+
+def test_parts_respect_max_version_and_order(generator):
+    data = bytes(range(256)) * 3
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        symbols = generator.generate_structured_append(data, 'L', max_version=5, executor=pool)
+    assert 1 < len(symbols) <= 16
+    assert all(symbol.version <= 5 and symbol.ec_level == 'L' for symbol in symbols)
+    executor = RecordingExecutor()
+    again = generator.generate_structured_append(data, 'L', max_version=5, executor=executor)
+    assert [job[2] for job in executor.jobs] == list(range(len(again)))
+    assert [s.matrix for s in again] == [s.matrix for s in symbols]
+
+
+def test_single_symbol_when_data_fits(generator):
+    symbols = generator.generate_structured_append('short', 'M', executor=RecordingExecutor())
+    assert len(symbols) == 1
+    assert symbols[0].matrix == generator.generate('short', 'M').matrix
+
+
+def test_too_large_for_sixteen_symbols(generator):
+    with pytest.raises(ValueError, match='16 symbols'):
+        generator.generate_structured_append(b'\xff' * 1000, 'H', max_version=1,
+                                             executor=RecordingExecutor())